@@ -1,5 +1,18 @@
-from collections import defaultdict
-from matcher import tokenize, normalize, Matcher
+import importlib.util
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+from matcher import Matcher, tokenize_series
+
+# numba (optional) compiles the n-gram kernel; it is imported on first use
+# (_compiled_ngram_keys), like matcher's PHRASE/BROAD kernel
+NUMBA_SUPPORT = importlib.util.find_spec('numba') is not None
+prange = range  # numba.prange once numba is imported
 
 def generate_ngrams(tokens: list[str], n: int) -> list[str]:
     """
@@ -9,95 +22,230 @@ def generate_ngrams(tokens: list[str], n: int) -> list[str]:
         return []
     return [" ".join(tokens[i:i+n]) for i in range(len(tokens)-n+1)]
 
-def analyze_search_terms(terms_df, negatives_df, max_n=3):
+def _ngram_keys(ids, offsets, max_n, base):
     """
-    Analyzes non-excluded search terms to find frequent N-grams.
-    Returns a DataFrame of N-gram statistics.
+    Emits one (term, key) pair per n-gram (n = 1..max_n) of every term.
+    Term t owns ids[offsets[t]:offsets[t+1]]. A key encodes the token ids of
+    the n-gram as mixed-radix digits (id + 1) in `base`, so it is exact and
+    ngrams of different lengths never collide. Keys are sorted within each
+    term and `first` flags the first occurrence of each key in its term.
     """
-    matcher = Matcher(negatives_df)
-    
-    # Dictionary to store stats: ngram -> {'count': 0, 'clicks': 0, 'cost': 0.0, 'impressions': 0}
-    stats = defaultdict(lambda: {'count': 0, 'clicks': 0, 'cost': 0.0, 'impressions': 0})
-    
-    # Pre-calculate column indices/names for speed or just use standard iteration
-    # Check if optional columns exist
-    has_clicks = 'Clicks' in terms_df.columns
-    has_cost = 'Cost' in terms_df.columns
-    has_imps = 'Impressions' in terms_df.columns
-    
-    for _, row in terms_df.iterrows():
-        term = str(row.get('Search term', ''))
-        
-        # 1. Check if excluded logic? 
-        # The requirements say "Output only search terms that are NOT excluded... so a marketer can review".
-        # Phase 2 goal: "Suggest 'new negatives' based on patterns"
-        # Usually we only want to analyze patterns in the *remaining* (non-excluded) terms.
-        # But maybe we want to analyze *all* terms to find patterns even if partially excluded?
-        # Let's assume we analyze ONLY non-excluded terms to find *new* negatives.
-        
-        is_excluded, _ = matcher.match(term)
-        if is_excluded:
-            continue
-            
-        # 2. Normalize & Tokenize
-        normalized = normalize(term)
-        tokens = tokenize(normalized)
-        
-        if not tokens:
-            continue
-            
-        # Get metrics
-        clicks = pd_safe_numeric(row.get('Clicks', 0)) if has_clicks else 0
-        cost = pd_safe_numeric(row.get('Cost', 0.0)) if has_cost else 0.0
-        imps = pd_safe_numeric(row.get('Impressions', 0)) if has_imps else 0
-        
-        # 3. Generate N-Grams (1 to max_n)
-        unique_ngrams_in_term = set()
+    n_terms = len(offsets) - 1
+    counts = np.zeros(n_terms, dtype=np.int64)
+    for t in range(n_terms):
+        length = offsets[t + 1] - offsets[t]
         for n in range(1, max_n + 1):
-            grams = generate_ngrams(tokens, n)
-            for gram in grams:
-                unique_ngrams_in_term.add(gram)
-        
-        # 4. Aggregate
-        # Note: If a term has "running shoes", and we count "shoes" and "running", 
-        # we are aggregating the metrics of the *whole search term* to the *ngram*.
-        # This is standard behavior for N-Gram scripts (WordNgram script).
-        for gram in unique_ngrams_in_term:
-            s = stats[gram]
-            s['count'] += 1
-            s['clicks'] += clicks
-            s['cost'] += cost
-            s['impressions'] += imps
-
-    # Convert to DataFrame
-    data = []
-    for gram, s in stats.items():
-        data.append({
-            'N-Gram': gram,
-            'Word Count': len(gram.split()),
-            'Occurrence Count': s['count'],
-            'Clicks': s['clicks'],
-            'Cost': s['cost'],
-            'Impressions': s['impressions']
-        })
-        
-    if not data:
+            if length >= n:
+                counts[t] += length - n + 1
+
+    starts = np.zeros(n_terms + 1, dtype=np.int64)
+    starts[1:] = np.cumsum(counts)
+    out_terms = np.empty(starts[-1], dtype=np.int64)
+    out_keys = np.empty(starts[-1], dtype=np.int64)
+    first = np.zeros(starts[-1], dtype=np.bool_)
+
+    # Each term writes its own slice, so terms can run in parallel
+    for t in prange(n_terms):
+        pos = starts[t]
+        hi = offsets[t + 1]
+        for i in range(offsets[t], hi):
+            key = 0
+            for j in range(i, min(i + max_n, hi)):
+                key = key * base + ids[j] + 1
+                out_terms[pos] = t
+                out_keys[pos] = key
+                pos += 1
+
+        # Each ngram counts once per search term (a per-term np.unique)
+        lo = starts[t]
+        if pos > lo:
+            out_keys[lo:pos] = np.sort(out_keys[lo:pos])
+            first[lo] = True
+            for k in range(lo + 1, pos):
+                first[k] = out_keys[k] != out_keys[k - 1]
+
+    return out_terms, out_keys, first
+
+@lru_cache(maxsize=None)
+def _compiled_ngram_keys():
+    """_ngram_keys compiled by numba (imported here), or None if numba fails to import"""
+    global prange
+    try:
+        from numba import njit, prange
+    except ImportError:
+        return None
+    return njit(cache=True, parallel=True)(_ngram_keys)
+
+def _ngram_pairs_numba(term_tokens, max_n):
+    """
+    Unique (term, ngram) pairs via the compiled kernel.
+    Returns (term_index, codes, labels), or None if keys would overflow int64
+    or numba can't be imported after all.
+    """
+    ngram_keys = _compiled_ngram_keys()
+    if ngram_keys is None:
+        return None
+
+    lengths = np.fromiter(map(len, term_tokens), dtype=np.int64, count=len(term_tokens))
+    ids, vocab = pd.factorize(np.array(list(chain.from_iterable(term_tokens)), dtype=object))
+    base = len(vocab) + 1
+    if base ** max_n >= 2 ** 63:
+        return None
+
+    offsets = np.zeros(len(term_tokens) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    term_index, keys, first = ngram_keys(ids.astype(np.int64), offsets, max_n, base)
+    term_index, keys = term_index[first], keys[first]
+
+    codes, unique_keys = pd.factorize(keys, sort=False)
+    labels = np.empty(len(unique_keys), dtype=object)
+    for i, key in enumerate(unique_keys.tolist()):
+        words = []
+        while key:
+            key, digit = divmod(key, base)
+            words.append(vocab[digit - 1])
+        labels[i] = " ".join(reversed(words))
+
+    return term_index, codes, labels
+
+def _ngram_pairs_pandas(term_tokens, max_n):
+    """
+    Unique (term, ngram) pairs via pandas explode.
+    Returns (term_index, codes, labels).
+    """
+    kept = pd.DataFrame({'term': np.arange(len(term_tokens)), 'tokens': term_tokens})
+
+    frames = []
+    for n in range(1, max_n + 1):
+        grams = kept['tokens'].map(lambda t: generate_ngrams(t, n))
+        frames.append(kept[['term']].assign(ngram=grams).explode('ngram'))
+    long_df = pd.concat(frames, ignore_index=True).dropna(subset=['ngram'])
+
+    # Each ngram counts once per search term
+    long_df = long_df.drop_duplicates(['term', 'ngram'])
+
+    codes, labels = pd.factorize(long_df['ngram'].to_numpy(), sort=False)
+    return long_df['term'].to_numpy(), codes, labels
+
+def _partial_ngram_stats(terms_df, matcher, max_n):
+    """
+    N-gram statistics for one frame of search terms (unsorted).
+    Returns None if no n-grams remain after exclusion.
+    """
+    terms = terms_df['Search term'].fillna('').astype(str)
+
+    # We only analyze the *remaining* (non-excluded) terms to find *new* negatives.
+    excluded = matcher.match_batch(terms)
+    tokens = tokenize_series(terms)
+    keep = ~excluded & (tokens.str.len() > 0).to_numpy()
+
+    if not keep.any():
+        return None
+
+    metrics = _coerce_metrics(terms_df)
+    term_tokens = tokens.to_numpy()[keep]
+    pairs = _ngram_pairs_numba(term_tokens, max_n) if NUMBA_SUPPORT else None
+    if pairs is None:
+        pairs = _ngram_pairs_pandas(term_tokens, max_n)
+    term_index, codes, labels = pairs
+
+    n_unique = len(labels)
+    if n_unique == 0:
         return None
-        
-    import pandas as pd
-    result_df = pd.DataFrame(data)
-    
+
+    # Note: If a term has "running shoes", and we count "shoes" and "running",
+    # we are aggregating the metrics of the *whole search term* to the *ngram*.
+    # This is standard behavior for N-Gram scripts (WordNgram script).
+    # Accumulate per-ngram metrics on integer codes (no string-keyed groupby).
+    def accumulate(col):
+        values = metrics[col][keep][term_index]
+        return np.bincount(codes, weights=values, minlength=n_unique)
+
+    return pd.DataFrame({
+        'N-Gram': labels,
+        'Word Count': pd.Series(labels, dtype=object).str.count(' ').to_numpy() + 1,
+        'Occurrence Count': np.bincount(codes, minlength=n_unique),
+        'Clicks': accumulate('Clicks'),
+        'Cost': accumulate('Cost'),
+        'Impressions': accumulate('Impressions'),
+    })
+
+_worker_matcher = None
+
+def _init_worker(matcher):
+    """Worker initializer: receive the shared Matcher once per worker process"""
+    global _worker_matcher
+    _worker_matcher = matcher
+
+def _worker_ngram_stats(terms_df, max_n):
+    """_partial_ngram_stats with the worker's Matcher"""
+    return _partial_ngram_stats(terms_df, _worker_matcher, max_n)
+
+def analyze_search_terms(terms_df, negatives_df=None, max_n=3, *, matcher=None, top_k=1000, n_jobs=1):
+    """
+    Analyzes non-excluded search terms to find frequent N-grams.
+    `terms_df` is a DataFrame or an iterable of DataFrame chunks
+    (e.g. main.iter_search_terms); chunk statistics are merged at the end.
+    Pass a prebuilt `matcher` to reuse it across calls; otherwise one is
+    built from `negatives_df`.
+    With n_jobs > 1 (None = all cores) chunks are analyzed in worker
+    processes; a single DataFrame is split into one chunk per worker.
+    Returns a DataFrame with the `top_k` most frequent N-grams
+    (all of them if top_k is None).
+    """
+    if matcher is None:
+        if negatives_df is None:
+            raise ValueError("analyze_search_terms needs negatives_df or a matcher")
+        matcher = Matcher(negatives_df)
+
+    if n_jobs == 1:
+        chunks = [terms_df] if isinstance(terms_df, pd.DataFrame) else terms_df
+        results = (_partial_ngram_stats(chunk, matcher, max_n) for chunk in chunks)
+        partials = [stats for stats in results if stats is not None]
+    else:
+        workers = n_jobs or os.cpu_count() or 1
+        if isinstance(terms_df, pd.DataFrame):
+            size = max(1, -(-len(terms_df) // workers))
+            chunks = [terms_df.iloc[i:i + size] for i in range(0, len(terms_df), size)]
+        else:
+            chunks = terms_df
+        # Spawned, not forked: a fork after numba's parallel kernels have
+        # started their thread pool in this process can deadlock the workers
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(matcher,)) as executor:
+            results = executor.map(partial(_worker_ngram_stats, max_n=max_n), chunks)
+            partials = [stats for stats in results if stats is not None]
+
+    if not partials:
+        return None
+
+    if len(partials) == 1:
+        result_df = partials[0]
+    else:
+        result_df = pd.concat(partials, ignore_index=True).groupby(
+            ['N-Gram', 'Word Count'], sort=False, as_index=False
+        ).sum()
+
     # Sort by Occurrence Count desc (or maybe Cost?)
     # usually Spend/Cost or Count is best
-    result_df = result_df.sort_values(by='Occurrence Count', ascending=False)
-    
-    return result_df
+    if top_k is None:
+        return result_df.sort_values(by='Occurrence Count', ascending=False)
+    return result_df.nlargest(top_k, 'Occurrence Count')
 
-def pd_safe_numeric(val):
-    """Safely converts pandas value to number"""
-    try:
-        if isinstance(val, str):
-            val = val.replace(',', '') # handle "1,000"
-        return float(val)
-    except:
-        return 0.0
+def _coerce_metrics(terms_df):
+    """
+    Optional metric columns as float arrays. Frames from main.load_search_terms
+    are numeric already; other columns are coerced once: thousands separators
+    are removed ("1,000") and anything non-numeric (or a missing column) becomes 0.
+    """
+    metrics = {}
+    for col in ('Clicks', 'Cost', 'Impressions'):
+        if col not in terms_df.columns:
+            metrics[col] = np.zeros(len(terms_df))
+            continue
+        if pd.api.types.is_numeric_dtype(terms_df[col]):
+            metrics[col] = terms_df[col].fillna(0).to_numpy(dtype=np.float64)
+            continue
+        values = terms_df[col].astype(str).str.replace(',', '', regex=False)
+        metrics[col] = pd.to_numeric(values, errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+    return metrics
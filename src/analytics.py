@@ -16,26 +16,47 @@ class PerformanceAnalytics:
         self.results_df = filtered_results_df
         self.metrics = {}
         
+        # Exclusion mask and metric columns are extracted once and sliced by
+        # every calculation below. Metrics are numeric already (coerced by
+        # main.load_search_terms).
+        # All are kept C-contiguous so the repeated masked scans are unit-stride.
+        self._mask = np.ascontiguousarray(self.results_df['excluded_by_negatives'].to_numpy(dtype=bool))
+        self._cost = self._numeric_column('Cost')
+        self._clicks = self._numeric_column('Clicks')
+        self._imps = self._numeric_column('Impressions')
+    
+    def _numeric_column(self, col):
+        """
+        Column as a C-contiguous float array, or None if the column is missing.
+        Frames from main.load_search_terms are numeric already; anything else
+        is coerced (non-numeric cells become NaN).
+        """
+        if col not in self.results_df.columns:
+            return None
+        values = self.results_df[col]
+        if not pd.api.types.is_numeric_dtype(values):
+            values = pd.to_numeric(values, errors='coerce')
+        return np.ascontiguousarray(values.to_numpy(dtype=np.float64))
+        
     def calculate_cost_savings(self):
         """Calculate immediate cost savings from exclusions"""
-        # Get excluded terms with performance metrics
-        excluded = self.results_df[self.results_df['excluded_by_negatives']]
+        n_excluded = int(self._mask.sum())
+        n_remaining = len(self._mask) - n_excluded
         
         # Safely handle cost column
-        if 'Cost' in excluded.columns:
-            total_cost_waste = pd.to_numeric(excluded['Cost'], errors='coerce').sum()
+        if self._cost is not None:
+            total_cost_waste = np.nansum(self._cost[self._mask])
         else:
             # Estimate from clicks if cost not available
-            total_cost_waste = len(excluded) * 2.5  # Assume $2.50 avg cost
+            total_cost_waste = n_excluded * 2.5  # Assume $2.50 avg cost
         
         self.metrics['cost_waste_prevented'] = round(total_cost_waste, 2)
         
         # Calculate for remaining terms
-        remaining = self.results_df[~self.results_df['excluded_by_negatives']]
-        if 'Cost' in remaining.columns:
-            total_remaining_cost = pd.to_numeric(remaining['Cost'], errors='coerce').sum()
+        if self._cost is not None:
+            total_remaining_cost = np.nansum(self._cost[~self._mask])
         else:
-            total_remaining_cost = len(remaining) * 2.5
+            total_remaining_cost = n_remaining * 2.5
             
         self.metrics['total_remaining_spend'] = round(total_remaining_cost, 2)
         
@@ -51,60 +72,52 @@ class PerformanceAnalytics:
     
     def calculate_quality_metrics(self):
         """Calculate quality and efficiency scores"""
-        excluded = self.results_df[self.results_df['excluded_by_negatives']]
-        remaining = self.results_df[~self.results_df['excluded_by_negatives']]
+        n_excluded = int(self._mask.sum())
         
         # Quality score: how focused is the remaining traffic
-        total_terms = len(self.results_df)
-        quality_ratio = len(remaining) / total_terms if total_terms > 0 else 0
+        total_terms = len(self._mask)
+        quality_ratio = (total_terms - n_excluded) / total_terms if total_terms > 0 else 0
         self.metrics['quality_score'] = round(quality_ratio * 100, 1)
         
         # Excluded term quality
-        if len(excluded) > 0 and 'Clicks' in excluded.columns:
-            avg_excluded_clicks = pd.to_numeric(excluded['Clicks'], errors='coerce').mean()
+        if n_excluded > 0 and self._clicks is not None:
+            avg_excluded_clicks = np.nanmean(self._clicks[self._mask])
             self.metrics['avg_clicks_excluded_term'] = round(avg_excluded_clicks, 1)
         
         # Efficiency: impressions that will never waste budget
-        if 'Impressions' in excluded.columns:
-            waste_impressions = pd.to_numeric(excluded['Impressions'], errors='coerce').sum()
+        if self._imps is not None:
+            waste_impressions = np.nansum(self._imps[self._mask])
             self.metrics['impressions_eliminated'] = int(waste_impressions)
         
         return self.metrics
     
     def identify_high_risk_terms(self):
         """Identify terms that are draining budget without ROI"""
-        remaining = self.results_df[~self.results_df['excluded_by_negatives']].copy()
-        risk_terms = []
+        remaining = ~self._mask
         
-        if len(remaining) == 0:
+        if not remaining.any() or self._imps is None or self._clicks is None:
             self.metrics['high_risk_terms'] = []
             return []
         
         # Terms with high impressions but low clicks (wasting impressions)
-        remaining['click_through_rate'] = 0
-        if 'Impressions' in remaining.columns and 'Clicks' in remaining.columns:
-            imps = pd.to_numeric(remaining['Impressions'], errors='coerce')
-            clicks = pd.to_numeric(remaining['Clicks'], errors='coerce')
-            remaining['click_through_rate'] = (clicks / imps.clip(lower=1)) * 100
-            
-            # Flag terms with 0 CTR and high impressions
-            low_performers = remaining[
-                (remaining['click_through_rate'] == 0) & 
-                (imps > imps.quantile(0.75))
-            ]
-            
-            for idx, row in low_performers.iterrows():
-                risk_terms.append({
-                    'term': str(row['Search term']),
-                    'impressions': int(row['Impressions']) if 'Impressions' in row else 0,
-                    'clicks': int(row['Clicks']) if 'Clicks' in row else 0,
-                    'risk_level': 'CRITICAL' if row['Impressions'] > imps.quantile(0.9) else 'HIGH'
-                })
-        
-        self.metrics['high_risk_terms'] = sorted(risk_terms, 
-                                                 key=lambda x: x['impressions'], 
-                                                 reverse=True)[:10]
-        return risk_terms
+        imps = self._imps[remaining]
+        clicks = self._clicks[remaining]
+        click_through_rate = (clicks / np.maximum(imps, 1)) * 100
+        
+        # Flag terms with 0 CTR and high impressions
+        q75, q90 = np.nanquantile(imps, [0.75, 0.9])
+        low_performers = (click_through_rate == 0) & (imps > q75)
+        
+        terms = self.results_df['Search term'].to_numpy()[remaining][low_performers]
+        risk_df = pd.DataFrame({
+            'term': list(map(str, terms)),
+            'impressions': imps[low_performers].astype(np.int64),
+            'clicks': clicks[low_performers].astype(np.int64),
+            'risk_level': np.where(imps[low_performers] > q90, 'CRITICAL', 'HIGH')
+        })
+        
+        self.metrics['high_risk_terms'] = risk_df.nlargest(10, 'impressions').to_dict('records')
+        return risk_df.to_dict('records')
     
     def generate_recommendation_score(self):
         """Generate overall action score (0-100)"""
@@ -140,8 +153,8 @@ class PerformanceAnalytics:
         summary = {
             'timestamp': datetime.now().isoformat(),
             'total_terms_analyzed': len(self.results_df),
-            'terms_excluded': int(self.results_df['excluded_by_negatives'].sum()),
-            'terms_remaining': int((~self.results_df['excluded_by_negatives']).sum()),
+            'terms_excluded': int(self._mask.sum()),
+            'terms_remaining': int((~self._mask).sum()),
             'metrics': self.metrics,
             'action_required': self.metrics['action_score'] >= 60,
             'recommendation': self._generate_recommendation()
@@ -4,90 +4,107 @@ Learns patterns from poor performers to autonomously suggest negatives
 """
 import pandas as pd
 import numpy as np
-from collections import defaultdict
-import re
 
 class AutoNegativeEngine:
     """Intelligent negative keyword generation from performance data"""
     
     def __init__(self, terms_df):
-        self.terms_df = terms_df.copy()
+        # The input is never mutated, so no defensive copy is needed
+        self.terms_df = terms_df
         self.suggested_negatives = []
         
+        # Metrics as numeric arrays (already coerced by main.load_search_terms;
+        # safe defaults for missing columns/values)
+        self._clicks = self._numeric_column('Clicks', 0)
+        self._imps = self._numeric_column('Impressions', 1)
+        self._cost = self._numeric_column('Cost', 0)
+    
+    def _numeric_column(self, col, default):
+        """Column as a C-contiguous float array, `default` where missing or non-numeric"""
+        if col not in self.terms_df.columns:
+            return np.full(len(self.terms_df), default, dtype=np.float64)
+        values = self.terms_df[col]
+        if not pd.api.types.is_numeric_dtype(values):
+            # Frames that did not come through main.load_search_terms
+            values = pd.to_numeric(values, errors='coerce')
+        values = values.to_numpy(dtype=np.float64)
+        return np.ascontiguousarray(np.where(np.isnan(values), default, values))
+        
     def analyze_poor_performers(self):
         """Find low-quality terms that should be negated"""
-        # Safe column access
-        if 'Clicks' not in self.terms_df.columns:
-            self.terms_df['Clicks'] = 0
-        if 'Impressions' not in self.terms_df.columns:
-            self.terms_df['Impressions'] = 1
-        if 'Cost' not in self.terms_df.columns:
-            self.terms_df['Cost'] = 0
-            
-        # Convert to numeric
-        self.terms_df['Clicks'] = pd.to_numeric(self.terms_df['Clicks'], errors='coerce').fillna(0)
-        self.terms_df['Impressions'] = pd.to_numeric(self.terms_df['Impressions'], errors='coerce').fillna(1)
-        self.terms_df['Cost'] = pd.to_numeric(self.terms_df['Cost'], errors='coerce').fillna(0)
-        
         # Calculate metrics safely (prevent division by zero)
-        self.terms_df['CTR'] = np.where(
-            self.terms_df['Impressions'] > 0,
-            (self.terms_df['Clicks'] / self.terms_df['Impressions']) * 100,
-            0
-        )
-        self.terms_df['CPC'] = np.where(
-            self.terms_df['Clicks'] > 0,
-            self.terms_df['Cost'] / self.terms_df['Clicks'],
-            0
-        )
+        ctr = np.divide(self._clicks, self._imps, out=np.zeros_like(self._clicks), where=self._imps > 0) * 100
+        cpc = np.divide(self._cost, self._clicks, out=np.zeros_like(self._cost), where=self._clicks > 0)
         
         # Identify poor performers (high impressions, zero clicks)
-        poor = self.terms_df[
-            (self.terms_df['CTR'] == 0) & 
-            (self.terms_df['Impressions'] > 10)
-        ]
+        poor_mask = (ctr == 0) & (self._imps > 10)
+        
+        # Only the poor rows are materialized, with numeric metrics attached
+        poor = self.terms_df.loc[poor_mask].assign(
+            Clicks=self._clicks[poor_mask],
+            Impressions=self._imps[poor_mask],
+            Cost=self._cost[poor_mask],
+            CTR=ctr[poor_mask],
+            CPC=cpc[poor_mask]
+        )
         
         return poor
     
     def extract_keywords_from_terms(self, terms):
-        """Break down terms into keyword components for pattern analysis"""
-        all_keywords = defaultdict(lambda: {'count': 0, 'cost': 0, 'clicks': 0, 'imps': 0})
-        
-        for _, row in terms.iterrows():
-            term = str(row['Search term']).lower().strip()
-            words = re.findall(r'\b\w+\b', term)
-            
-            for word in words:
-                all_keywords[word]['count'] += 1
-                all_keywords[word]['cost'] += float(row.get('Cost', 0))
-                all_keywords[word]['clicks'] += int(row.get('Clicks', 0))
-                all_keywords[word]['imps'] += int(row.get('Impressions', 0))
-        
-        return all_keywords
+        """Break down terms into keyword components for pattern analysis
+        
+        Returns a DataFrame indexed by word with count/cost/clicks/imps columns,
+        in order of first appearance. Missing search terms contribute no words.
+        """
+        words = terms['Search term'].fillna('').astype(str).str.lower().str.findall(r'\b\w+\b')
+        
+        # Every word occurrence carries the metrics of its whole search term
+        metrics = terms.reindex(columns=['Cost', 'Clicks', 'Impressions'], fill_value=0)
+        long_df = pd.DataFrame({
+            'word': words.to_numpy(),
+            'cost': metrics['Cost'].to_numpy(dtype=np.float64),
+            'clicks': metrics['Clicks'].to_numpy().astype(np.int64),
+            'imps': metrics['Impressions'].to_numpy().astype(np.int64)
+        }).explode('word').dropna(subset=['word'])
+        
+        return long_df.groupby('word', sort=False).agg(
+            count=('word', 'size'),
+            cost=('cost', 'sum'),
+            clicks=('clicks', 'sum'),
+            imps=('imps', 'sum')
+        )
     
-    def calculate_confidence_score(self, keyword, keyword_stats, total_poor_performers):
-        """Calculate confidence that this keyword should be excluded (0-100)"""
-        score = 0
+    def calculate_confidence_scores(self, keyword_stats, total_poor_performers):
+        """
+        Confidence that each keyword should be excluded (0-100), as a float
+        array aligned with `keyword_stats` (an extract_keywords_from_terms frame)
+        """
+        count = keyword_stats['count'].to_numpy()
+        cost = keyword_stats['cost'].to_numpy(dtype=np.float64)
+        clicks = keyword_stats['clicks'].to_numpy()
+        imps = keyword_stats['imps'].to_numpy()
         
         # Occurrence frequency (up to 30 points)
         # Cap ratio at 1.0 to avoid exceeding max score
-        max_ratio = min(1.0, keyword_stats['count'] / max(total_poor_performers, 1))
-        score += max_ratio * 30
+        frequency_score = np.minimum(1.0, count / max(total_poor_performers, 1)) * 30
         
         # Zero-click rate (up to 40 points)
-        if keyword_stats['imps'] > 0:
-            zero_click_rate = 1 - (keyword_stats['clicks'] / keyword_stats['imps'])
-            score += min(40, zero_click_rate * 40)
-        
-        # Cost per click (up to 30 points)
-        if keyword_stats['clicks'] > 0:
-            cpc = keyword_stats['cost'] / keyword_stats['clicks']
-            if cpc > 5:  # High CPC indicates wasted spend
-                score += 30
-            elif cpc > 2:
-                score += 15
-        
-        return min(100, score)
+        zero_click_rate = 1 - clicks / np.maximum(imps, 1)
+        zero_click_score = np.where(imps > 0, np.minimum(40, zero_click_rate * 40), 0)
+        
+        # Cost per click (up to 30 points), high CPC indicates wasted spend
+        cpc = np.divide(cost, clicks, out=np.zeros(len(cost)), where=clicks > 0)
+        cpc_score = np.select([cpc > 5, cpc > 2], [30, 15], default=0)
+        
+        return np.minimum(100, frequency_score + zero_click_score + cpc_score)
+    
+    def _get_impact_ratings(self, confidence, cost):
+        """Rate impact of each suggestion (arrays of confidence scores and costs)"""
+        return np.select(
+            [(confidence >= 85) & (cost > 100), (confidence >= 75) & (cost > 50), confidence >= 65],
+            ['CRITICAL', 'HIGH', 'MEDIUM'],
+            default='LOW'
+        )
     
     def generate_suggestions(self, threshold=65):
         """Generate automatic negative keyword suggestions"""
@@ -99,44 +116,32 @@ class AutoNegativeEngine:
         # Extract keywords from poor performers
         poor_keywords = self.extract_keywords_from_terms(poor_performers)
         
-        # Score each keyword
-        suggestions = []
-        for keyword, stats in poor_keywords.items():
-            confidence = self.calculate_confidence_score(
-                keyword, stats, len(poor_performers)
-            )
-            
-            if confidence >= threshold:
-                suggestions.append({
-                    'keyword': keyword,
-                    'confidence': round(confidence, 1),
-                    'occurrences': stats['count'],
-                    'zero_click_count': stats['imps'] - stats['clicks'],
-                    'wasted_cost': round(stats['cost'], 2),
-                    'match_type': 'BROAD',
-                    'impact_rating': self._get_impact_rating(confidence, stats['cost'])
-                })
-        
-        # Sort by impact
-        self.suggested_negatives = sorted(
-            suggestions, 
-            key=lambda x: x['confidence'] * (x['wasted_cost'] + 1), 
-            reverse=True
-        )
+        # Score every keyword at once
+        confidence = self.calculate_confidence_scores(poor_keywords, len(poor_performers))
+        count = poor_keywords['count'].to_numpy()
+        cost = poor_keywords['cost'].to_numpy()
+        clicks = poor_keywords['clicks'].to_numpy()
+        imps = poor_keywords['imps'].to_numpy()
+        impact_rating = self._get_impact_ratings(confidence, cost)
+        
+        selected = confidence >= threshold
+        suggestions = pd.DataFrame({
+            'keyword': poor_keywords.index[selected],
+            'confidence': np.round(confidence[selected], 1),
+            'occurrences': count[selected],
+            'zero_click_count': (imps - clicks)[selected],
+            'wasted_cost': np.round(cost[selected], 2),
+            'match_type': 'BROAD',
+            'impact_rating': impact_rating[selected]
+        })
+        
+        # Sort by impact (stable, so ties keep first-appearance order)
+        priority = suggestions['confidence'] * (suggestions['wasted_cost'] + 1)
+        order = np.argsort(-priority.to_numpy(), kind='stable')
+        self.suggested_negatives = suggestions.iloc[order].to_dict('records')
         
         return self.suggested_negatives[:20]  # Return top 20
     
-    def _get_impact_rating(self, confidence, cost):
-        """Rate impact of this suggestion"""
-        if confidence >= 85 and cost > 100:
-            return "CRITICAL"
-        elif confidence >= 75 and cost > 50:
-            return "HIGH"
-        elif confidence >= 65:
-            return "MEDIUM"
-        else:
-            return "LOW"
-    
     def export_to_ads_format(self):
         """Export suggestions in Google Ads Editor format"""
         if not self.suggested_negatives:
@@ -1,14 +1,65 @@
 ﻿import pandas as pd
+import numpy as np
 import argparse
 import sys
 import os
 from datetime import datetime
 import warnings
 import csv
-import chardet  # For detecting file encoding
 import re
+import itertools
+import pickle
+import tempfile
+import hashlib
+import codecs
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 warnings.filterwarnings('ignore')
 
+# Rows per chunk when streaming large search terms files
+SEARCH_TERMS_CHUNKSIZE = 200_000
+
+# Standard Google Ads metric columns, coerced to numbers when loading search terms
+METRIC_COLUMNS = ['Clicks', 'Impressions', 'Cost', 'Conversions']
+
+# Opt-in on-disk cache of loaded + bucketed negatives (--cache-negatives), one
+# file per content hash in a per-user cache directory (see
+# load_negatives_with_buckets); only the most recently used entries are kept.
+# Bump the version whenever the bucket layout changes
+NEG_CACHE_DIR = os.path.join(
+    (os.environ.get('LOCALAPPDATA') if os.name == 'nt' else os.environ.get('XDG_CACHE_HOME'))
+    or os.path.join(os.path.expanduser('~'), '.cache'),
+    'search-term-filter', 'negatives')
+NEG_CACHE_VERSION = 3
+NEG_CACHE_MAX_ENTRIES = 16
+
+# Supported negative keyword match types, in matching priority order
+MATCH_TYPES = ['EXACT', 'PHRASE', 'BROAD']
+
+# Decode error handler for streamed CSVs: chunks are already handed out when a
+# byte that isn't valid in the detected encoding turns up, so instead of
+# re-reading the file with another encoding (as read_data_file does) the
+# offending bytes are decoded as latin-1
+_LATIN1_FALLBACK = 'search-term-filter-latin1'
+codecs.register_error(_LATIN1_FALLBACK,
+                      lambda error: (error.object[error.start:error.end].decode('latin-1'), error.end))
+
+# Surrounding quote/bracket pair (same rules as normalize_text) and whitespace runs
+_QB_RE = re.compile(r'^(?:(["\'])(.*)\1|\[(.*)\])$', re.DOTALL)
+_WS_RE = re.compile(r'\s+')
+
+# File encoding detection: prefer the compiled cchardet / charset-normalizer,
+# falling back to pure-Python chardet
+try:
+    import cchardet as chardet
+except ImportError:
+    try:
+        import charset_normalizer as chardet
+    except ImportError:
+        import chardet
+
 # Try to import PDF libraries (optional)
 try:
     import pdfplumber
@@ -17,25 +68,104 @@ except ImportError:
     PDF_SUPPORT = False
     print("Note: PDF support not available. Install pdfplumber for PDF support.")
 
+# The optional readers below are only checked for here and imported when a
+# file needs them (by pandas, or in _iter_raw_chunks), so small uploads don't
+# pay their import cost on every start
+
+# PyArrow's multithreaded CSV reader is used when available (optional)
+PYARROW_SUPPORT = importlib.util.find_spec('pyarrow') is not None
+
+# Rust-backed Excel reader, much faster than openpyxl (optional, pandas >= 2.2)
+CALAMINE_SUPPORT = (importlib.util.find_spec('python_calamine') is not None and
+                    tuple(int(part) for part in pd.__version__.split('.')[:2]) >= (2, 2))
+
+# openpyxl is only needed to stream .xlsx files (optional)
+XLSX_STREAMING = importlib.util.find_spec('openpyxl') is not None
+
+# PHRASE/BROAD index building and the compiled matching kernel are shared
+# with Matcher; the Aho-Corasick automaton and the numba kernel are optional
+from matcher import (AHOCORASICK_SUPPORT, KERNEL_MIN_TERMS, NUMBA_SUPPORT, build_kernel_index,
+                     build_phrase_automaton, match_tokens_kernel, rarest_tokens)
+
 def detect_file_type(filepath):
     """Detect file type based on extension"""
     ext = os.path.splitext(filepath)[1].lower()
     return ext
 
 def detect_encoding(filepath):
-    """Detect file encoding"""
+    """
+    Detect file encoding: BOM and pure-ASCII samples are answered directly,
+    anything else goes through the detector's incremental API when it has one
+    (chardet, cchardet) or a one-shot detect() (charset-normalizer)
+    """
     try:
         with open(filepath, 'rb') as f:
             raw_data = f.read(10000)  # Read first 10KB to detect encoding
-            result = chardet.detect(raw_data)
-            return result['encoding']
+        
+        if raw_data.startswith(b'\xef\xbb\xbf'):
+            return 'utf-8-sig'
+        if raw_data[:2] in (b'\xff\xfe', b'\xfe\xff'):
+            return 'utf-16'
+        if raw_data.isascii():
+            return 'utf-8'  # ASCII is a subset, and the rest of the file may not be
+        
+        if not hasattr(chardet, 'UniversalDetector'):
+            return chardet.detect(raw_data)['encoding'] or 'utf-8'
+        
+        detector = chardet.UniversalDetector()
+        for start in range(0, len(raw_data), 4096):
+            detector.feed(raw_data[start:start + 4096])
+            if detector.done:
+                break
+        detector.close()
+        return detector.result['encoding'] or 'utf-8'
     except:
         return 'utf-8'  # Default to utf-8
 
-def read_data_file(filepath, file_type=None):
+def read_csv_file(filepath, encoding):
+    """
+    Read a CSV with the PyArrow engine when available,
+    falling back to pandas' C engine (whole-file type inference, cached dates)
+    """
+    if PYARROW_SUPPORT:
+        try:
+            df = pd.read_csv(filepath, encoding=encoding, engine='pyarrow', on_bad_lines='skip')
+            # Arrow keeps text that isn't valid in `encoding` as bytes instead of
+            # raising; the C reader raises, so read_data_file can retry other encodings
+            if not any(col.dtype == object and pd.api.types.infer_dtype(col, skipna=True) == 'bytes'
+                       for _, col in df.items()):
+                return df
+            print(f"  PyArrow reader found text that is not {encoding}, using C reader...")
+        except Exception as e:
+            print(f"  PyArrow reader failed ({e}), using C reader...")
+    return pd.read_csv(filepath, encoding=encoding, engine='c', on_bad_lines='skip',
+                       low_memory=False, cache_dates=True)
+
+def read_excel_file(filepath):
+    """
+    Read an Excel workbook with the calamine engine when available,
+    falling back to pandas' default engine (openpyxl / xlrd)
+    """
+    if CALAMINE_SUPPORT:
+        try:
+            return pd.read_excel(filepath, engine='calamine')
+        except Exception as e:
+            print(f"  Calamine reader failed ({e}), using default Excel reader...")
+    return pd.read_excel(filepath)
+
+def write_csv(df, filepath, append=False):
+    """
+    Write a DataFrame as CSV (no index) with pandas' writer, so every output
+    keeps the same quoting and number/boolean formatting.
+    With append=True the rows are added to an existing file without a header.
+    """
+    df.to_csv(filepath, index=False, mode='a' if append else 'w', header=not append)
+
+def read_data_file(filepath, file_type=None, encoding=None):
     """
     Read data from various file formats
     Supports: .csv, .xlsx, .xls, .pdf
+    Pass the CSV `encoding` when it is known to skip encoding detection.
     """
     if file_type is None:
         file_type = detect_file_type(filepath)
@@ -44,14 +174,15 @@ def read_data_file(filepath, file_type=None):
     
     try:
         if file_type == '.csv':
-            # Detect encoding first
-            encoding = detect_encoding(filepath)
-            print(f"  Detected encoding: {encoding}")
+            # Detect encoding first (unless the caller knows it)
+            if encoding is None:
+                encoding = detect_encoding(filepath)
+                print(f"  Detected encoding: {encoding}")
             
             # Try different CSV reading strategies
             try:
                 # First try with detected encoding
-                df = pd.read_csv(filepath, encoding=encoding, on_bad_lines='skip')
+                df = read_csv_file(filepath, encoding)
             except Exception as e:
                 print(f"  Read with {encoding} failed: {e}")
                 # Try common encodings
@@ -61,7 +192,7 @@ def read_data_file(filepath, file_type=None):
                         continue  # Already tried
                     try:
                         print(f"  Trying {enc} encoding...")
-                        df = pd.read_csv(filepath, encoding=enc, on_bad_lines='skip')
+                        df = read_csv_file(filepath, enc)
                         print(f"  Success with {enc} encoding")
                         break
                     except:
@@ -93,7 +224,7 @@ def read_data_file(filepath, file_type=None):
             df = df.reset_index(drop=True)
         
         elif file_type in ['.xlsx', '.xls']:
-            df = pd.read_excel(filepath)
+            df = read_excel_file(filepath)
             df = df.dropna(how='all')  # Remove completely empty rows
             df = df.reset_index(drop=True)
         
@@ -101,19 +232,18 @@ def read_data_file(filepath, file_type=None):
             if not PDF_SUPPORT:
                 raise ImportError("PDF support requires pdfplumber. Install with: pip install pdfplumber")
             
-            # Extract tables from PDF
+            # Extract the first table in the PDF (later pages are never parsed)
             with pdfplumber.open(filepath) as pdf:
-                tables = []
                 for page in pdf.pages:
                     page_tables = page.extract_tables()
                     if page_tables:
-                        tables.extend(page_tables)
-                
-                if not tables:
+                        first_table = page_tables[0]
+                        break
+                else:
                     raise ValueError("No tables found in PDF")
                 
                 # Convert first table to DataFrame
-                df = pd.DataFrame(tables[0])
+                df = pd.DataFrame(first_table)
                 
                 # Use first row as header if it looks like column names
                 if df.shape[0] > 1:
@@ -156,15 +286,11 @@ def normalize_column_names(df, file_type='search_terms'):
     
     # For search terms file
     if file_type == 'search_terms':
-        # Try to find search term column
-        search_term_col = None
-        for col in df_columns:
-            for variation in column_mappings['search_terms']['variations']:
-                if variation.lower() in col.lower():
-                    search_term_col = col
-                    break
-            if search_term_col:
-                break
+        # Try to find search term column (first column containing any variation)
+        cols_lower = [(col, col.lower()) for col in df_columns]
+        variations_lower = {variation.lower() for variation in column_mappings['search_terms']['variations']}
+        search_term_col = next((col for col, col_lower in cols_lower
+                                if any(variation in col_lower for variation in variations_lower)), None)
         
         if search_term_col:
             df = df.rename(columns={search_term_col: 'Search term'})
@@ -222,9 +348,25 @@ def normalize_column_names(df, file_type='search_terms'):
     
     return df
 
-def load_search_terms(filepath):
-    """Load and normalize search terms file"""
-    df = read_data_file(filepath)
+def _coerce_metric_columns(df):
+    """In place: METRIC_COLUMNS present in df become numbers ("1,200" -> 1200, junk -> 0)"""
+    for col in METRIC_COLUMNS:
+        if col not in df.columns:
+            continue
+        if pd.api.types.is_numeric_dtype(df[col]):
+            # Already parsed by the reader (PyArrow/calamine); only fill blanks
+            if df[col].hasnans:
+                df[col] = df[col].fillna(0)
+            continue
+        values = df[col].astype(str).str.replace(',', '', regex=False)
+        df[col] = pd.to_numeric(values, errors='coerce').fillna(0)
+
+def _prepare_search_terms(df):
+    """
+    Normalize columns of a raw search terms frame and validate them.
+    Metric columns (METRIC_COLUMNS) come out as int64/float64: thousands
+    separators are removed and non-numeric cells become 0.
+    """
     df = normalize_column_names(df, 'search_terms')
     
     # Ensure required columns exist
@@ -235,6 +377,9 @@ def load_search_terms(filepath):
         if col not in df.columns:
             raise ValueError(f"Search terms file missing required column: '{col}'")
     
+    # Coerce metrics once here so downstream stages don't have to
+    _coerce_metric_columns(df)
+    
     # Fill optional columns if missing
     for col in optional:
         if col not in df.columns:
@@ -243,9 +388,75 @@ def load_search_terms(filepath):
     
     return df
 
-def load_negatives(filepath):
+def load_search_terms(filepath, encoding=None):
+    """Load and normalize search terms file"""
+    df = read_data_file(filepath, encoding=encoding)
+    return _prepare_search_terms(df)
+
+def _iter_raw_chunks(filepath, file_type, chunksize, encoding=None):
+    """Yield raw DataFrame chunks of a CSV or .xlsx file"""
+    if file_type == '.csv':
+        if encoding is None:
+            encoding = detect_encoding(filepath)
+            print(f"  Detected encoding: {encoding}")
+        yield from pd.read_csv(filepath, encoding=encoding, encoding_errors=_LATIN1_FALLBACK,
+                               engine='c', on_bad_lines='skip', low_memory=False, chunksize=chunksize)
+    else:
+        import openpyxl
+        
+        # Read-only mode streams rows instead of loading the whole workbook
+        workbook = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+        try:
+            # First sheet, like pd.read_excel's default sheet_name=0 (not the active one)
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            # Row labels continue across chunks, as with pandas' CSV chunk reader
+            start = 0
+            while True:
+                batch = list(itertools.islice(rows, chunksize))
+                if not batch:
+                    break
+                yield pd.DataFrame(batch, columns=header, index=pd.RangeIndex(start, start + len(batch)))
+                start += len(batch)
+        finally:
+            workbook.close()
+
+def iter_search_terms(filepath, chunksize=SEARCH_TERMS_CHUNKSIZE, encoding=None):
+    """
+    Load and normalize a search terms file in chunks of `chunksize` rows,
+    so memory stays O(chunksize) instead of O(file).
+    Columns are detected and validated on the first chunk only; later chunks
+    reuse its column names. Formats that can't be streamed (.xls, .pdf) are
+    yielded as a single chunk.
+    """
+    file_type = detect_file_type(filepath)
+    if not (file_type == '.csv' or (file_type == '.xlsx' and XLSX_STREAMING)):
+        yield load_search_terms(filepath, encoding)
+        return
+    
+    print(f"Reading {file_type} file in chunks of {chunksize} rows: {filepath}")
+    
+    columns = None
+    added = []
+    for chunk in _iter_raw_chunks(filepath, file_type, chunksize, encoding):
+        chunk = chunk.dropna(how='all')  # Remove completely empty rows
+        if columns is None:
+            n_raw = chunk.shape[1]
+            chunk = _prepare_search_terms(chunk)
+            columns = list(chunk.columns[:n_raw])
+            added = list(chunk.columns[n_raw:])
+        else:
+            chunk.columns = columns
+            _coerce_metric_columns(chunk)
+            for col in added:
+                chunk[col] = 0
+        yield chunk
+
+def load_negatives(filepath, encoding=None):
     """Load and normalize negative keywords file"""
-    df = read_data_file(filepath)
+    df = read_data_file(filepath, encoding=encoding)
     df = normalize_column_names(df, 'negatives')
     
     # Ensure required columns
@@ -260,14 +471,120 @@ def load_negatives(filepath):
         print("  Added default match_type: BROAD")
     
     # Clean up data - safely convert to string
-    neg_kw = df['negative_keyword'].fillna('').astype(str)
-    df['negative_keyword'] = neg_kw.str.strip() if isinstance(neg_kw, pd.Series) else neg_kw.apply(lambda x: str(x).strip())
-    if 'match_type' in df.columns:
-        match_t = df['match_type'].fillna('BROAD').astype(str)
-        df['match_type'] = match_t.str.strip().str.upper() if isinstance(match_t, pd.Series) else match_t.apply(lambda x: str(x).strip().upper())
+    df['negative_keyword'] = df['negative_keyword'].fillna('').astype(str).str.strip()
+    df['match_type'] = df['match_type'].fillna('BROAD').astype(str).str.strip().str.upper()
+    
+    # match_type only takes a few values, so store it as a categorical (int8 codes).
+    # Unknown types become NaN; they could never match anything, so drop them.
+    df['match_type'] = pd.Categorical(df['match_type'], categories=MATCH_TYPES)
+    invalid = df['match_type'].isna()
+    if invalid.any():
+        print(f"  Dropped {int(invalid.sum())} negatives with invalid match_type (expected {', '.join(MATCH_TYPES)})")
+        df = df[~invalid].reset_index(drop=True)
     
     return df
 
+def _file_digest(filepath):
+    """SHA-1 hex digest of a file's contents"""
+    digest = hashlib.sha1()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _neg_cache_path(digest):
+    return os.path.join(NEG_CACHE_DIR, f'{digest}.pkl')
+
+def _neg_cache_dir_is_private():
+    """
+    True if NEG_CACHE_DIR is a directory owned by the current user that
+    nobody else can write to, i.e. its pickles can only have been written by us
+    """
+    try:
+        st = os.stat(NEG_CACHE_DIR)
+    except OSError:
+        return False
+    if not os.path.isdir(NEG_CACHE_DIR):
+        return False
+    if hasattr(os, 'getuid'):  # POSIX; on Windows the per-user LOCALAPPDATA ACLs apply
+        return st.st_uid == os.getuid() and not st.st_mode & 0o022
+    return True
+
+def _read_neg_cache(digest, key):
+    """(negatives_df, negative_buckets) from the on-disk cache if stored under `key`, else None"""
+    if not _neg_cache_dir_is_private():
+        return None
+    path = _neg_cache_path(digest)
+    try:
+        with open(path, 'rb') as f:
+            cached_key, negatives_df, negative_buckets = pickle.load(f)
+    except Exception:
+        return None
+    if cached_key != key:
+        return None
+    try:
+        os.utime(path)  # Mark as recently used for _prune_neg_cache
+    except OSError:
+        pass
+    return negatives_df, negative_buckets
+
+def _prune_neg_cache():
+    """Delete all but the NEG_CACHE_MAX_ENTRIES most recently used cache files"""
+    try:
+        entries = [entry for entry in os.scandir(NEG_CACHE_DIR) if entry.name.endswith('.pkl')]
+        entries.sort(key=lambda entry: entry.stat().st_mtime_ns, reverse=True)
+        for entry in entries[NEG_CACHE_MAX_ENTRIES:]:
+            os.remove(entry.path)
+    except OSError as e:
+        print(f"  Could not prune negatives cache: {e}")
+
+def _write_neg_cache(digest, key, negatives_df, negative_buckets):
+    """Store the processed negatives under `key` (atomic replace; failures only warn)"""
+    tmp_path = None
+    try:
+        os.makedirs(NEG_CACHE_DIR, mode=0o700, exist_ok=True)
+        if not _neg_cache_dir_is_private():
+            print(f"  Not caching negatives: {NEG_CACHE_DIR} is not private to this user")
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=NEG_CACHE_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((key, negatives_df, negative_buckets), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, _neg_cache_path(digest))
+        tmp_path = None
+        _prune_neg_cache()
+    except Exception as e:
+        print(f"  Could not write negatives cache: {e}")
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def load_negatives_with_buckets(filepath, use_cache=False):
+    """
+    load_negatives + build_negative_buckets.
+    With use_cache=True the result is reused from an on-disk cache keyed by
+    the file's content hash (so a renamed or re-uploaded copy of the same list
+    hits too). The cache stores the negatives, so it is off by default: the
+    web server's uploads must not outlive their request. Only the
+    NEG_CACHE_MAX_ENTRIES most recently used lists are kept, and nothing is
+    read from or written to a cache directory other users could write to.
+    Returns (negatives_df, negative_buckets).
+    """
+    if not use_cache:
+        negatives_df = load_negatives(filepath)
+        return negatives_df, build_negative_buckets(negatives_df)
+    
+    digest = _file_digest(filepath)
+    key = (NEG_CACHE_VERSION, digest, AHOCORASICK_SUPPORT, NUMBA_SUPPORT)
+    
+    cached = _read_neg_cache(digest, key)
+    if cached is not None:
+        print(f"  Using cached negatives ({_neg_cache_path(digest)})")
+        return cached
+    
+    negatives_df = load_negatives(filepath)
+    negative_buckets = build_negative_buckets(negatives_df)
+    _write_neg_cache(digest, key, negatives_df, negative_buckets)
+    return negatives_df, negative_buckets
+
 def normalize_text(text: str) -> str:
     """
     Normalizes a search term or negative keyword according to spec:
@@ -290,10 +607,21 @@ def normalize_text(text: str) -> str:
         text = text[1:-1]
     
     # Collapse multiple spaces
-    text = re.sub(r'\s+', ' ', text)
+    text = _WS_RE.sub(' ', text)
     
     return text.strip()
 
+def normalize_series(texts: pd.Series) -> pd.Series:
+    """
+    normalize_text over a whole Series using vectorized string ops.
+    Repeated values (same query in many ad groups) are normalized once.
+    """
+    codes, uniques = pd.factorize(texts.fillna('').astype(str))
+    uniques = pd.Series(uniques, dtype=object).str.lower().str.strip()
+    uniques = uniques.str.replace(_QB_RE, r'\2\3', regex=True)
+    uniques = uniques.str.replace(_WS_RE, ' ', regex=True).str.strip()
+    return pd.Series(uniques.to_numpy()[codes], index=texts.index, dtype=object)
+
 def tokenize_text(text: str) -> list:
     """Splits text by space into tokens."""
     return text.split()
@@ -315,111 +643,233 @@ def is_phrase_match_token_aware(search_tokens: list, phrase_tokens: list) -> boo
     
     return False
 
-def filter_search_terms(terms_df, negatives_df):
-    """Filter search terms based on negative keywords using optimized operations"""
-    print("Filtering terms...")
+def build_match_index(phrase_negatives, broad_negatives):
+    """
+    Index PHRASE/BROAD negatives so a term is scanned once instead of once per negative.
+    Returns (phrase_index, broad_by_pivot, kernel_index): an Aho-Corasick
+    automaton over space-padded phrases (without pyahocorasick, a
+    {length: {token tuple: position}} lookup), broad negatives filed as
+    (position, frozenset) under their rarest token, and the integer-coded
+    form of both for the compiled kernel (None without numba, see
+    matcher.build_kernel_index).
+    Positions refer to the bucket lists, so the first listed negative wins.
+    """
+    phrase_tokens = [phrase_tokens for phrase_tokens, _ in phrase_negatives]
+    broad_token_sets = [broad_token_set for broad_token_set, _ in broad_negatives]
     
-    # Normalize and prepare data
-    terms_df = terms_df.copy()
-    negatives_df = negatives_df.copy()
+    phrase_index = build_phrase_automaton(phrase_tokens) if AHOCORASICK_SUPPORT else None
+    if phrase_index is None:
+        phrase_index = {}
+        for pos, tokens in enumerate(phrase_tokens):
+            phrase_index.setdefault(len(tokens), {}).setdefault(tuple(tokens), pos)
     
-    # Normalize search terms using proper normalization function
-    terms_df['search_term_normalized'] = terms_df['Search term'].fillna('').astype(str).apply(normalize_text)
-    terms_df['search_term_tokens'] = terms_df['search_term_normalized'].apply(tokenize_text)
+    # A term can only contain a broad negative if it contains its rarest token
+    pivots = rarest_tokens(broad_token_sets)
+    broad_by_pivot = {}
+    for pos, (pivot, broad_token_set) in enumerate(zip(pivots, broad_token_sets)):
+        broad_by_pivot.setdefault(pivot, []).append((pos, frozenset(broad_token_set)))
     
-    # Normalize negatives
-    negatives_df['negative_normalized'] = negatives_df['negative_keyword'].fillna('').astype(str).apply(normalize_text)
-    negatives_df['negative_tokens'] = negatives_df['negative_normalized'].apply(tokenize_text)
-    negatives_df['match_type'] = negatives_df['match_type'].fillna('BROAD').astype(str).str.strip().str.upper()
+    kernel_index = None
+    if NUMBA_SUPPORT:
+        kernel_index = build_kernel_index(phrase_tokens, broad_token_sets, pivots)
     
-    # Separate negatives by match type for efficient processing
-    exact_negatives = []
-    phrase_negatives = []
-    broad_negatives = []
+    return phrase_index, broad_by_pivot, kernel_index
+
+def _match_tokens(token_lists, phrase_index, broad_by_pivot, kernel_index):
+    """
+    (phrase_hit, broad_hit) positions for each token list, -1 where nothing matches.
+    Uses the compiled kernel when a kernel_index is available and there are
+    at least KERNEL_MIN_TERMS terms.
+    """
+    if kernel_index is not None and len(token_lists) >= KERNEL_MIN_TERMS:
+        hits = match_tokens_kernel(token_lists, kernel_index,
+                                   partial(_first_phrase_match, phrase_index=phrase_index))
+        if hits is not None:
+            return hits
     
-    for _, row in negatives_df.iterrows():
-        neg_normalized = row['negative_normalized']
-        neg_tokens = row['negative_tokens']
-        neg_keyword = row['negative_keyword']
-        match_type = row['match_type']
-        
-        if not neg_tokens:  # Skip empty
+    n_terms = len(token_lists)
+    phrase_hit = np.full(n_terms, -1, dtype=np.int64)
+    broad_hit = np.full(n_terms, -1, dtype=np.int64)
+    for i, search_tokens in enumerate(token_lists):
+        if not search_tokens:
             continue
         
+        # PHRASE first (token-aware to avoid false positives), then BROAD
+        phrase_pos = _first_phrase_match(search_tokens, phrase_index)
+        if phrase_pos is not None:
+            phrase_hit[i] = phrase_pos
+            continue
+        broad_pos = _first_broad_match(set(search_tokens), broad_by_pivot)
+        if broad_pos is not None:
+            broad_hit[i] = broad_pos
+    return phrase_hit, broad_hit
+
+def _first_phrase_match(search_tokens, phrase_index):
+    """Position of the first PHRASE negative contained in the term, or None"""
+    if isinstance(phrase_index, dict):
+        # Look up each of the term's n-grams whose length some phrase has
+        n_tokens = len(search_tokens)
+        hits = (phrase_grams.get(tuple(search_tokens[i:i + length]))
+                for length, phrase_grams in phrase_index.items()
+                for i in range(n_tokens - length + 1))
+        return min((pos for pos in hits if pos is not None), default=None)
+    
+    padded = f" {' '.join(search_tokens)} "
+    return min((pos for _, pos in phrase_index.iter(padded)), default=None)
+
+def _first_broad_match(search_token_set, broad_by_pivot):
+    """Position of the first BROAD negative whose tokens are all in the term, or None"""
+    candidates = itertools.chain.from_iterable(broad_by_pivot[token] for token in search_token_set
+                                               if token in broad_by_pivot)
+    return min((pos for pos, broad_token_set in candidates if broad_token_set <= search_token_set),
+               default=None)
+
+def build_negative_buckets(negatives_df):
+    """
+    Normalize negatives and split them by match type.
+    Returns (exact_set, phrase_negatives, broad_negatives, match_index) where
+    exact_set maps normalized keyword -> original keyword, phrase entries are
+    (tokens, keyword), broad entries are (token_set, keyword) and match_index
+    is the build_match_index result.
+    """
+    # Normalize negatives (load_negatives already stores match_type as a
+    # MATCH_TYPES categorical; anything else is cleaned up as strings)
+    normalized = normalize_series(negatives_df['negative_keyword'])
+    match_type = negatives_df['match_type']
+    if not (isinstance(match_type.dtype, pd.CategoricalDtype) and
+            set(match_type.cat.categories) <= set(MATCH_TYPES)):
+        match_type = match_type.fillna('BROAD').astype(str).str.strip().str.upper()
+    negatives = pd.DataFrame({
+        'negative_normalized': normalized,
+        'negative_tokens': normalized.str.split(),
+        'negative_keyword': negatives_df['negative_keyword'],
+        'match_type': match_type.fillna('BROAD'),
+    })
+    
+    # Empty negatives can never match, so drop them before bucketing
+    negatives = negatives[negatives['negative_tokens'].str.len() > 0]
+    
+    # Separate negatives by match type for efficient processing
+    # (exact_set maps normalized -> original for O(1) lookup)
+    exact_set = {}
+    phrase_negatives = []
+    broad_negatives = []
+    for match_type, group in negatives.groupby('match_type', sort=False, observed=True):
         if match_type == 'EXACT':
-            exact_negatives.append((neg_normalized, neg_keyword))
+            exact_set = dict(zip(group['negative_normalized'], group['negative_keyword']))
         elif match_type == 'PHRASE':
-            phrase_negatives.append((neg_tokens, neg_keyword))
+            phrase_negatives = list(zip(group['negative_tokens'], group['negative_keyword']))
         elif match_type == 'BROAD':
-            broad_negatives.append((set(neg_tokens), neg_keyword))
+            broad_negatives = [(set(tokens), keyword)
+                               for tokens, keyword in zip(group['negative_tokens'], group['negative_keyword'])]
     
-    # Convert exact to set for O(1) lookup
-    exact_set = {norm: orig for norm, orig in exact_negatives}
+    match_index = build_match_index(phrase_negatives, broad_negatives)
     
-    # Initialize result columns
-    terms_df['excluded_by_negatives'] = False
-    terms_df['exclusion_reason'] = 'Not matched by any negative'
-    terms_df['matched_negative_keyword'] = ''
-    terms_df['matched_negative_match_type'] = ''
+    return exact_set, phrase_negatives, broad_negatives, match_index
+
+def _match_terms(terms_df, negative_buckets, checked_at):
+    """
+    Match one frame of search terms against the negative buckets.
+    Returns terms_df plus the exclusion columns and checked_at (terms_df
+    itself is not modified).
+    """
+    # Normalize search terms using proper normalization function. As a
+    # categorical, the EXACT lookup and tokenizing run once per distinct term.
+    # Kept as local Series so terms_df is neither copied nor mutated.
+    search_normalized = normalize_series(terms_df['Search term']).astype('category')
+    search_tokens = search_normalized.str.split()
     
-    # Process each search term
-    for idx in terms_df.index:
-        if terms_df.at[idx, 'excluded_by_negatives']:
-            continue  # Already excluded
-        
-        search_normalized = terms_df.at[idx, 'search_term_normalized']
-        search_tokens = terms_df.at[idx, 'search_term_tokens']
-        
-        if not search_tokens:
-            continue
-        
-        # 1. Check EXACT matches (fastest - O(1) lookup)
-        if search_normalized in exact_set:
-            terms_df.at[idx, 'excluded_by_negatives'] = True
-            terms_df.at[idx, 'exclusion_reason'] = f"Excluded by EXACT negative: {exact_set[search_normalized]}"
-            terms_df.at[idx, 'matched_negative_keyword'] = exact_set[search_normalized]
-            terms_df.at[idx, 'matched_negative_match_type'] = 'EXACT'
-            continue
-        
-        # 2. Check PHRASE matches (token-aware to avoid false positives)
-        for phrase_tokens, phrase_keyword in phrase_negatives:
-            if is_phrase_match_token_aware(search_tokens, phrase_tokens):
-                terms_df.at[idx, 'excluded_by_negatives'] = True
-                terms_df.at[idx, 'exclusion_reason'] = f"Excluded by PHRASE negative: {phrase_keyword}"
-                terms_df.at[idx, 'matched_negative_keyword'] = phrase_keyword
-                terms_df.at[idx, 'matched_negative_match_type'] = 'PHRASE'
-                break
-        
-        if terms_df.at[idx, 'excluded_by_negatives']:
-            continue  # Already excluded by phrase
-        
-        # 3. Check BROAD matches (all words must be present)
-        search_token_set = set(search_tokens)
-        for broad_token_set, broad_keyword in broad_negatives:
-            if broad_token_set.issubset(search_token_set):
-                terms_df.at[idx, 'excluded_by_negatives'] = True
-                terms_df.at[idx, 'exclusion_reason'] = f"Excluded by BROAD negative: {broad_keyword}"
-                terms_df.at[idx, 'matched_negative_keyword'] = broad_keyword
-                terms_df.at[idx, 'matched_negative_match_type'] = 'BROAD'
-                break
+    exact_set, phrase_negatives, broad_negatives, match_index = negative_buckets
+    phrase_index, broad_by_pivot, kernel_index = match_index
     
-    # Add timestamp
-    terms_df['checked_at'] = datetime.now().isoformat()
+    # Result columns are filled positionally in NumPy arrays, then assigned once
+    n_terms = len(terms_df)
+    excluded = np.zeros(n_terms, dtype=bool)
+    matched_keyword = np.full(n_terms, '', dtype=object)
+    matched_match_type = np.full(n_terms, '', dtype=object)
     
-    # Prepare result DataFrames
-    # Primary output: only non-excluded terms (for manual review)
-    results_df = terms_df[~terms_df['excluded_by_negatives']].copy()
-    # Audit output: all terms with exclusion info
-    audit_df = terms_df.copy()
+    # 1. Check EXACT matches for all terms at once (one hash lookup per term)
+    exact_matches = search_normalized.map(exact_set)
+    mask_exact = exact_matches.notna().to_numpy()
+    exact_keywords = exact_matches[mask_exact]
+    excluded[mask_exact] = True
+    matched_keyword[mask_exact] = exact_keywords.to_numpy()
+    matched_match_type[mask_exact] = 'EXACT'
+    
+    # 2./3. Check PHRASE, then BROAD matches for the remaining terms;
+    # blank terms (common in report exports) never match and are skipped
+    remaining = np.flatnonzero(~mask_exact & (search_normalized != '').to_numpy())
+    phrase_hit, broad_hit = _match_tokens(search_tokens.to_numpy()[remaining],
+                                          phrase_index, broad_by_pivot, kernel_index)
+    for match_type, hits, negatives in (('PHRASE', phrase_hit, phrase_negatives),
+                                        ('BROAD', broad_hit, broad_negatives)):
+        matched = hits >= 0
+        rows = remaining[matched]
+        keywords = [negatives[pos][1] for pos in hits[matched]]
+        excluded[rows] = True
+        matched_keyword[rows] = keywords
+        matched_match_type[rows] = match_type
     
-    # Remove temporary columns
-    cols_to_drop = ['search_term_normalized', 'search_term_tokens']
-    results_df = results_df.drop(columns=cols_to_drop, errors='ignore')
-    audit_df = audit_df.drop(columns=cols_to_drop, errors='ignore')
+    # Exclusion reasons are built in one pass over the excluded rows
+    reason = np.full(n_terms, 'Not matched by any negative', dtype=object)
+    reason[excluded] = ("Excluded by " + matched_match_type[excluded] + " negative: "
+                        + matched_keyword[excluded].astype(str).astype(object))
     
-    # Ensure excluded_by_negatives is boolean
-    results_df['excluded_by_negatives'] = results_df['excluded_by_negatives'].astype(bool)
-    audit_df['excluded_by_negatives'] = audit_df['excluded_by_negatives'].astype(bool)
+    return terms_df.assign(
+        excluded_by_negatives=excluded,
+        exclusion_reason=reason,
+        matched_negative_keyword=matched_keyword,
+        matched_negative_match_type=matched_match_type,
+        checked_at=checked_at,
+    )
+
+_worker_buckets = None
+
+def _init_match_worker(negative_buckets):
+    """Worker initializer: receive the negative buckets once per worker process"""
+    global _worker_buckets
+    _worker_buckets = negative_buckets
+
+def _worker_match_terms(terms_df, checked_at):
+    """_match_terms with the worker's negative buckets"""
+    return _match_terms(terms_df, _worker_buckets, checked_at)
+
+def filter_search_terms(terms_df, negatives_df, negative_buckets=None, n_jobs=1):
+    """
+    Filter search terms based on negative keywords using optimized operations.
+    `terms_df` is a DataFrame or an iterable of DataFrame chunks (e.g.
+    iter_search_terms); chunks are matched one at a time and concatenated.
+    With n_jobs > 1 (None = all cores) chunks are matched in worker processes;
+    a single DataFrame is split into one shard per worker.
+    `negative_buckets` may be a prebuilt build_negative_buckets(negatives_df) result.
+    """
+    print("Filtering terms...")
+    
+    if negative_buckets is None:
+        negative_buckets = build_negative_buckets(negatives_df)
+    checked_at = datetime.now().isoformat()
+    
+    chunks = [terms_df] if isinstance(terms_df, pd.DataFrame) else terms_df
+    if n_jobs == 1:
+        parts = [_match_terms(chunk, negative_buckets, checked_at) for chunk in chunks]
+    else:
+        workers = n_jobs or os.cpu_count() or 1
+        if isinstance(terms_df, pd.DataFrame):
+            size = max(1, -(-len(terms_df) // workers))
+            chunks = [terms_df.iloc[i:i + size] for i in range(0, len(terms_df), size)] or [terms_df]
+        # Spawned, not forked: a fork after numba's parallel kernels have
+        # started their thread pool in this process can deadlock the workers
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_match_worker, initargs=(negative_buckets,)) as executor:
+            parts = list(executor.map(partial(_worker_match_terms, checked_at=checked_at), chunks))
+    if not parts:
+        raise ValueError("No search terms to filter")
+    
+    # Audit output: all terms with exclusion info
+    audit_df = parts[0] if len(parts) == 1 else pd.concat(parts)
+    
+    # Primary output: only non-excluded terms (for manual review)
+    results_df = audit_df[~audit_df['excluded_by_negatives']]
     
     # Separate excluded and included terms
     excluded_count = audit_df['excluded_by_negatives'].sum()
@@ -429,6 +879,179 @@ def filter_search_terms(terms_df, negatives_df):
     
     return results_df, audit_df
 
+def stream_filter(terms_path, negatives_path, output_path, audit_output=None,
+                  chunksize=SEARCH_TERMS_CHUNKSIZE, load_negatives_fn=None):
+    """
+    Filter a search terms file chunk by chunk, appending each chunk's review
+    (and audit) rows to the output CSVs as soon as it is matched, so memory
+    stays O(chunksize) however large the file is. Analytics and suggestions
+    need the whole file and are not produced.
+    Returns (excluded_count, remaining_count).
+    """
+    for filepath in [terms_path, negatives_path]:
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(f"File not found: {filepath}")
+        if os.path.getsize(filepath) == 0:
+            raise ValueError(f"File is empty: {filepath}")
+    
+    print(f"Loading negatives from: {negatives_path}")
+    negatives_df, negative_buckets = (load_negatives_fn or load_negatives_with_buckets)(negatives_path)
+    if negatives_df.empty:
+        raise ValueError("Negatives file is empty after loading")
+    
+    print(f"Streaming search terms from: {terms_path}")
+    checked_at = datetime.now().isoformat()
+    excluded_count = remaining_count = 0
+    for i, chunk in enumerate(iter_search_terms(terms_path, chunksize)):
+        audit_df = _match_terms(chunk, negative_buckets, checked_at)
+        results_df = audit_df[~audit_df['excluded_by_negatives']]
+        write_csv(results_df, output_path, append=i > 0)
+        if audit_output:
+            write_csv(audit_df, audit_output, append=i > 0)
+        excluded_count += len(audit_df) - len(results_df)
+        remaining_count += len(results_df)
+    
+    if excluded_count + remaining_count == 0:
+        raise ValueError("No search terms to filter")
+    print(f"Filtering complete. Excluded {excluded_count} terms. Remaining {remaining_count} terms for review.")
+    return excluded_count, remaining_count
+
+def process_campaign(terms_path, negatives_path, output_path, audit_output=None,
+                     analyze_output=None, analytics_output=None, suggestions_output=None,
+                     load_negatives_fn=None, n_jobs=1):
+    """
+    Run the full filter + analytics pipeline for one campaign and save its outputs.
+    `load_negatives_fn(path)` may supply (negatives_df, negative_buckets), e.g. from
+    a cache shared across campaigns; defaults to an uncached load_negatives_with_buckets.
+    `n_jobs` is passed to filter_search_terms.
+    Raises on invalid input; returns the executive summary.
+    """
+    # Load data
+    # Validate input file paths and sizes
+    MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
+    
+    for filepath in [terms_path, negatives_path]:
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(f"File not found: {filepath}")
+        file_size = os.path.getsize(filepath)
+        if file_size > MAX_FILE_SIZE:
+            raise ValueError(f"File too large ({file_size} bytes > {MAX_FILE_SIZE}): {filepath}")
+        if file_size == 0:
+            raise ValueError(f"File is empty: {filepath}")
+    
+    print(f"Loading search terms from: {terms_path}")
+    terms_df = load_search_terms(terms_path)
+    
+    print(f"Loading negatives from: {negatives_path}")
+    negatives_df, negative_buckets = (load_negatives_fn or load_negatives_with_buckets)(negatives_path)
+    
+    # Validate loaded data
+    if terms_df.empty:
+        raise ValueError("Search terms file is empty after loading")
+    if negatives_df.empty:
+        raise ValueError("Negatives file is empty after loading")
+    
+    print(f"Loaded {len(terms_df)} search terms and {len(negatives_df)} negatives.")
+    
+    # Filter terms
+    results_df, audit_df = filter_search_terms(terms_df, negatives_df, negative_buckets, n_jobs=n_jobs)
+    
+    # ELITE: Generate analytics and insights
+    print("Analyzing performance metrics...")
+    try:
+        # Import from same package (ensure src directory is in path)
+        src_dir = os.path.dirname(os.path.abspath(__file__))
+        if src_dir not in sys.path:
+            sys.path.insert(0, src_dir)
+        from analytics import PerformanceAnalytics
+        analytics = PerformanceAnalytics(terms_df, negatives_df, results_df)
+        exec_summary = analytics.get_executive_summary()
+    except Exception as e:
+        print(f"Warning: Analytics engine error: {e}")
+        # Calculate from audit_df which has all terms
+        excluded_count = int(audit_df['excluded_by_negatives'].sum())
+        total_count = len(audit_df)
+        exec_summary = {
+            'metrics': {'cost_waste_prevented': 0, 'cost_reduction_percentage': 0, 'quality_score': 0, 'action_score': 0},
+            'total_terms_analyzed': total_count,
+            'terms_excluded': excluded_count,
+            'terms_remaining': total_count - excluded_count,
+            'recommendation': []
+        }
+    
+    # ELITE: Auto-generate negative suggestions
+    print("Generating AI negative keyword suggestions...")
+    try:
+        # Import from same package
+        from auto_negative import AutoNegativeEngine
+        auto_neg = AutoNegativeEngine(terms_df)
+        auto_suggestions = auto_neg.generate_suggestions(threshold=65)
+        impact = auto_neg.get_impact_summary()
+    except Exception as e:
+        print(f"Warning: Auto-negative engine error: {e}")
+        auto_suggestions = []
+        impact = {'total_suggested': 0, 'potential_cost_savings': 0, 'potential_impression_reduction': 0, 'top_priority': None}
+    
+    # Print elite metrics to console
+    print("\n" + "="*60)
+    print("ELITE PERFORMANCE METRICS")
+    print("="*60)
+    print(f"Cost Waste Prevented: ${exec_summary['metrics'].get('cost_waste_prevented', 0):,.2f}")
+    print(f"Cost Reduction: {exec_summary['metrics'].get('cost_reduction_percentage', 0):.1f}%")
+    print(f"Terms Excluded: {exec_summary['terms_excluded']} / {exec_summary['total_terms_analyzed']}")
+    print(f"Quality Score: {exec_summary['metrics'].get('quality_score', 0):.1f}%")
+    print(f"Action Score: {exec_summary['metrics'].get('action_score', 0)}/100")
+    print(f"\nAI Suggestions: {impact.get('total_suggested', 0)} new negatives identified")
+    print(f"Potential Additional Savings: ${impact.get('potential_cost_savings', 0):,.2f}")
+    top_priority = impact.get('top_priority', 'None identified')
+    print(f"Priority Action: {top_priority}")
+    print("="*60 + "\n")
+    
+    # Save outputs
+    print(f"Saving review output to: {output_path}")
+    write_csv(results_df, output_path)
+    
+    if audit_output:
+        print(f"Saving audit output to: {audit_output}")
+        write_csv(audit_df, audit_output)
+    
+    # ELITE: Save analytics
+    if analytics_output:
+        print(f"Saving analytics to: {analytics_output}")
+        import json
+        with open(analytics_output, 'w') as f:
+            json.dump(exec_summary, f, indent=2, default=str)
+    
+    # ELITE: Save auto-generated suggestions
+    if suggestions_output:
+        print(f"Saving AI suggestions to: {suggestions_output}")
+        suggestions_df = pd.DataFrame(auto_suggestions)
+        write_csv(suggestions_df, suggestions_output)
+        
+        # Also save Google Ads import format
+        ads_format = auto_neg.export_to_ads_format()
+        ads_file = suggestions_output.replace('.csv', '_ads_import.csv')
+        with open(ads_file, 'w') as f:
+            f.write(ads_format)
+        print(f"Saved Google Ads import format to: {ads_file}")
+    
+    if analyze_output:
+        print(f"Saving analysis output to: {analyze_output}")
+        write_csv(results_df, analyze_output)
+    
+    print("Done. Elite processing complete.")
+    return exec_summary
+
+def _job_count(value):
+    """argparse type for --jobs: a worker count >= 0"""
+    try:
+        jobs = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid job count: '{value}'")
+    if jobs < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 (all cores) or more, got {jobs}")
+    return jobs
+
 def main():
     parser = argparse.ArgumentParser(description='Elite Google Ads Filter - ROI Optimization Engine')
     parser.add_argument('--terms', required=True, help='Search terms file (CSV, Excel, or PDF)')
@@ -439,125 +1062,32 @@ def main():
     parser.add_argument('--editor-export', help='Export format for Google Ads Editor')
     parser.add_argument('--analytics-output', help='Output JSON file for analytics dashboard')
     parser.add_argument('--suggestions-output', help='Output CSV file for auto-generated negative suggestions')
+    parser.add_argument('--jobs', type=_job_count, default=1,
+                        help='Worker processes for term matching (0 = all cores, default 1)')
+    parser.add_argument('--cache-negatives', action='store_true',
+                        help='Reuse the processed negatives list across runs (stored in the user cache dir)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Filter in chunks and write review/audit CSVs progressively '
+                             '(for large files; skips analytics and suggestions)')
     
     args = parser.parse_args()
     
+    load_negatives_fn = partial(load_negatives_with_buckets, use_cache=True) if args.cache_negatives else None
+    
     try:
-        # Load data
-        # Validate input file paths and sizes
-        MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
-        
-        for filepath in [args.terms, args.negatives]:
-            if not os.path.exists(filepath):
-                raise FileNotFoundError(f"File not found: {filepath}")
-            file_size = os.path.getsize(filepath)
-            if file_size > MAX_FILE_SIZE:
-                raise ValueError(f"File too large ({file_size} bytes > {MAX_FILE_SIZE}): {filepath}")
-            if file_size == 0:
-                raise ValueError(f"File is empty: {filepath}")
-        
-        print(f"Loading search terms from: {args.terms}")
-        terms_df = load_search_terms(args.terms)
-        
-        print(f"Loading negatives from: {args.negatives}")
-        negatives_df = load_negatives(args.negatives)
-        
-        # Validate loaded data
-        if terms_df.empty:
-            raise ValueError("Search terms file is empty after loading")
-        if negatives_df.empty:
-            raise ValueError("Negatives file is empty after loading")
-        
-        print(f"Loaded {len(terms_df)} search terms and {len(negatives_df)} negatives.")
-        
-        # Filter terms
-        results_df, audit_df = filter_search_terms(terms_df, negatives_df)
-        
-        # ELITE: Generate analytics and insights
-        print("Analyzing performance metrics...")
-        try:
-            # Import from same package (ensure src directory is in path)
-            src_dir = os.path.dirname(os.path.abspath(__file__))
-            if src_dir not in sys.path:
-                sys.path.insert(0, src_dir)
-            from analytics import PerformanceAnalytics
-            analytics = PerformanceAnalytics(terms_df, negatives_df, results_df)
-            exec_summary = analytics.get_executive_summary()
-        except Exception as e:
-            print(f"Warning: Analytics engine error: {e}")
-            # Calculate from audit_df which has all terms
-            excluded_count = int(audit_df['excluded_by_negatives'].sum())
-            total_count = len(audit_df)
-            exec_summary = {
-                'metrics': {'cost_waste_prevented': 0, 'cost_reduction_percentage': 0, 'quality_score': 0, 'action_score': 0},
-                'total_terms_analyzed': total_count,
-                'terms_excluded': excluded_count,
-                'terms_remaining': total_count - excluded_count,
-                'recommendation': []
-            }
-        
-        # ELITE: Auto-generate negative suggestions
-        print("Generating AI negative keyword suggestions...")
-        try:
-            # Import from same package
-            from auto_negative import AutoNegativeEngine
-            auto_neg = AutoNegativeEngine(terms_df)
-            auto_suggestions = auto_neg.generate_suggestions(threshold=65)
-            impact = auto_neg.get_impact_summary()
-        except Exception as e:
-            print(f"Warning: Auto-negative engine error: {e}")
-            auto_suggestions = []
-            impact = {'total_suggested': 0, 'potential_cost_savings': 0, 'potential_impression_reduction': 0, 'top_priority': None}
-        
-        # Print elite metrics to console
-        print("\n" + "="*60)
-        print("ELITE PERFORMANCE METRICS")
-        print("="*60)
-        print(f"Cost Waste Prevented: ${exec_summary['metrics'].get('cost_waste_prevented', 0):,.2f}")
-        print(f"Cost Reduction: {exec_summary['metrics'].get('cost_reduction_percentage', 0):.1f}%")
-        print(f"Terms Excluded: {exec_summary['terms_excluded']} / {exec_summary['total_terms_analyzed']}")
-        print(f"Quality Score: {exec_summary['metrics'].get('quality_score', 0):.1f}%")
-        print(f"Action Score: {exec_summary['metrics'].get('action_score', 0)}/100")
-        print(f"\nAI Suggestions: {impact.get('total_suggested', 0)} new negatives identified")
-        print(f"Potential Additional Savings: ${impact.get('potential_cost_savings', 0):,.2f}")
-        top_priority = impact.get('top_priority', 'None identified')
-        print(f"Priority Action: {top_priority}")
-        print("="*60 + "\n")
-        
-        # Save outputs
-        print(f"Saving review output to: {args.output}")
-        results_df.to_csv(args.output, index=False)
-        
-        if args.audit_output:
-            print(f"Saving audit output to: {args.audit_output}")
-            audit_df.to_csv(args.audit_output, index=False)
-        
-        # ELITE: Save analytics
-        if args.analytics_output:
-            print(f"Saving analytics to: {args.analytics_output}")
-            import json
-            with open(args.analytics_output, 'w') as f:
-                json.dump(exec_summary, f, indent=2, default=str)
-        
-        # ELITE: Save auto-generated suggestions
-        if args.suggestions_output:
-            print(f"Saving AI suggestions to: {args.suggestions_output}")
-            suggestions_df = pd.DataFrame(auto_suggestions)
-            suggestions_df.to_csv(args.suggestions_output, index=False)
-            
-            # Also save Google Ads import format
-            ads_format = auto_neg.export_to_ads_format()
-            ads_file = args.suggestions_output.replace('.csv', '_ads_import.csv')
-            with open(ads_file, 'w') as f:
-                f.write(ads_format)
-            print(f"Saved Google Ads import format to: {ads_file}")
-        
-        if args.analyze_output:
-            print(f"Saving analysis output to: {args.analyze_output}")
-            results_df.to_csv(args.analyze_output, index=False)
-        
-        print("Done. Elite processing complete.")
-        
+        if args.stream:
+            stream_filter(args.terms, args.negatives, args.output, audit_output=args.audit_output,
+                          load_negatives_fn=load_negatives_fn)
+            return
+        process_campaign(
+            args.terms, args.negatives, args.output,
+            audit_output=args.audit_output,
+            analyze_output=args.analyze_output,
+            analytics_output=args.analytics_output,
+            suggestions_output=args.suggestions_output,
+            load_negatives_fn=load_negatives_fn,
+            n_jobs=args.jobs
+        )
     except Exception as e:
         print(f"Error: {e}")
         import traceback
@@ -1,5 +1,33 @@
+import importlib.util
 import re
+from collections import Counter
+from functools import lru_cache
+from itertools import chain
 
+import numpy as np
+import pandas as pd
+
+# Try to import pyahocorasick (optional) for batch PHRASE matching
+try:
+    import ahocorasick
+    AHOCORASICK_SUPPORT = True
+except ImportError:
+    AHOCORASICK_SUPPORT = False
+
+# numba (optional) compiles the batch PHRASE/BROAD kernel. It is only imported
+# when the kernel first runs (_compiled_match_kernel), and only for at least
+# KERNEL_MIN_TERMS terms: below that, importing it and loading the compiled
+# kernel takes longer than matching in Python
+NUMBA_SUPPORT = importlib.util.find_spec('numba') is not None
+KERNEL_MIN_TERMS = 200_000
+prange = range  # numba.prange once numba is imported
+
+# Surrounding quotes (single or double) or brackets on the whole string.
+# Exactly one of the groups 2/3 participates, so r'\2\3' yields the inner text.
+_SURROUND_RE = re.compile(r'^(?:(["\'])(.*)\1|\[(.*)\])$', re.DOTALL)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+@lru_cache(maxsize=131072)
 def normalize(text: str) -> str:
     """
     Normalizes a search term or negative keyword.
@@ -7,26 +35,44 @@ def normalize(text: str) -> str:
     2. Trim whitespace
     3. Collapse multiple spaces
     4. Remove surrounding quotes/brackets
+    Results are cached: search term and negative files repeat the same strings a lot.
     """
     if not isinstance(text, str):
         return ""
     
     text = text.lower().strip()
     
-    # Remove surrounding quotes (single or double) on the whole string
+    # Remove surrounding quotes (single or double) or brackets on the whole string
     # e.g., "running shoes" -> running shoes
-    if text.startswith('"') and text.endswith('"') and len(text) > 1:
-        text = text[1:-1]
-    elif text.startswith("'") and text.endswith("'") and len(text) > 1:
-        text = text[1:-1]
-    elif text.startswith("[") and text.endswith("]") and len(text) > 1:
-        text = text[1:-1]
+    text = _SURROUND_RE.sub(r'\2\3', text)
         
     # Collapse multiple spaces
-    text = re.sub(r'\s+', ' ', text)
+    text = _WHITESPACE_RE.sub(' ', text)
     
     return text.strip()
 
+def _text_series(terms: pd.Series) -> pd.Series:
+    """Lowercased, trimmed text with surrounding quotes/brackets removed"""
+    is_str = terms.map(lambda value: isinstance(value, str)).astype(bool)
+    text = terms.where(is_str, '').astype(str)
+    text = text.str.lower().str.strip()
+    return text.str.replace(_SURROUND_RE, r'\2\3', regex=True)
+
+def normalize_series(terms: pd.Series) -> pd.Series:
+    """
+    Vectorized `normalize` over a whole Series of strings.
+    Non-string values normalize to "" exactly like the scalar version.
+    """
+    text = _text_series(terms).str.replace(_WHITESPACE_RE, ' ', regex=True)
+    return text.str.strip()
+
+def tokenize_series(terms: pd.Series) -> pd.Series:
+    """
+    Vectorized `tokenize(normalize(text))` in a single pass: splitting on
+    whitespace already collapses and trims it.
+    """
+    return _text_series(terms).str.split()
+
 def tokenize(text: str) -> list[str]:
     """
     Splits text by space into tokens.
@@ -66,37 +112,300 @@ def is_broad_match(search_tokens: list[str], negative_tokens: list[str]) -> bool
     negative_set = set(negative_tokens)
     return negative_set.issubset(search_set)
 
+def build_phrase_automaton(phrase_tokens):
+    """
+    Aho-Corasick automaton over space-padded phrases (token lists), valued by
+    the position of the first phrase with those tokens, so one scan of a
+    space-padded term finds every phrase on token boundaries.
+    None without pyahocorasick or phrases.
+    """
+    if not (AHOCORASICK_SUPPORT and phrase_tokens):
+        return None
+    automaton = ahocorasick.Automaton()
+    for pos, tokens in enumerate(phrase_tokens):
+        key = f" {' '.join(tokens)} "
+        if key not in automaton:
+            automaton.add_word(key, pos)
+    automaton.make_automaton()
+    return automaton
+
+def rarest_tokens(token_sets):
+    """
+    Each token set's least frequent token across all sets (ties: smallest),
+    the pivot BROAD negatives are filed under: a term can only contain a
+    broad negative if it contains its rarest token.
+    """
+    token_freq = Counter(token for token_set in token_sets for token in token_set)
+    return [min(token_set, key=lambda token: (token_freq[token], token)) for token_set in token_sets]
+
+def build_kernel_index(phrase_tokens, broad_token_sets, pivots):
+    """
+    Integer-coded PHRASE/BROAD negatives for _match_kernel.
+    Tokens become ids into `vocab`; a phrase becomes one mixed-radix key
+    (id + 1 digits in `base`) and broad negatives are CSR arrays of sorted
+    ids, grouped by pivot token (see rarest_tokens). Phrases too long for an
+    int64 key are left out; `long_phrase_len` (0 if there are none) is the
+    shortest of them, so terms with at least that many tokens get their
+    PHRASE check in Python.
+    Returns (vocab, base, long_phrase_len, *kernel arrays).
+    """
+    vocab = pd.Index(pd.unique(np.array(
+        [token for tokens in phrase_tokens for token in tokens] +
+        [token for token_set in broad_token_sets for token in token_set],
+        dtype=object)))
+    base = len(vocab) + 1
+    # Longest phrase whose key fits in int64 (base is 1 without any tokens)
+    kernel_len = 1
+    while kernel_len < 63 and base ** (kernel_len + 1) < 2 ** 63:
+        kernel_len += 1
+    lengths = [len(tokens) for tokens in phrase_tokens]
+    long_lengths = [length for length in lengths if length > kernel_len]
+    long_phrase_len = min(long_lengths, default=0)
+    if long_lengths:
+        print(f"  {len(long_lengths)} PHRASE negatives are too long for the compiled matcher; "
+              f"checking them in Python")
+    max_len = max((length for length in lengths if length <= kernel_len), default=0)
+    
+    # PHRASE: sorted keys with the first position listing each one
+    phrase_first = {}
+    is_phrase_len = np.zeros(max_len + 1, dtype=np.bool_)
+    for pos, tokens in enumerate(phrase_tokens):
+        if len(tokens) > kernel_len:
+            continue
+        key = 0
+        for token_id in vocab.get_indexer(tokens):
+            key = key * base + int(token_id) + 1
+        phrase_first.setdefault(key, pos)
+        is_phrase_len[len(tokens)] = True
+    phrase_keys = np.array(sorted(phrase_first), dtype=np.int64)
+    phrase_pos = np.array([phrase_first[key] for key in phrase_keys.tolist()], dtype=np.int64)
+    
+    # BROAD: rule token ids (sorted) and the rules filed under each pivot id
+    rule_ids = [np.sort(vocab.get_indexer(list(token_set))) for token_set in broad_token_sets]
+    rule_offsets = np.zeros(len(rule_ids) + 1, dtype=np.int64)
+    np.cumsum([len(ids) for ids in rule_ids], out=rule_offsets[1:])
+    pivot_ids = vocab.get_indexer(list(pivots)).astype(np.int64)
+    pivot_rules = np.argsort(pivot_ids, kind='stable')
+    pivot_offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(pivot_ids, minlength=len(vocab)), out=pivot_offsets[1:])
+    
+    return (vocab, base, long_phrase_len, is_phrase_len, phrase_keys, phrase_pos,
+            pivot_offsets, pivot_rules, rule_offsets,
+            np.concatenate(rule_ids + [np.empty(0, dtype=np.int64)]).astype(np.int64))
+
+def _match_kernel(term_ids, term_offsets, base, is_phrase_len, phrase_keys, phrase_pos,
+                  pivot_offsets, pivot_rules, rule_offsets, rule_ids):
+    """
+    First PHRASE and (if none) first BROAD negative position for every term,
+    -1 where nothing matches. Term t owns term_ids[term_offsets[t]:term_offsets[t+1]];
+    ids are -1 for tokens no negative uses.
+    """
+    n_terms = len(term_offsets) - 1
+    max_len = len(is_phrase_len) - 1
+    phrase_hit = np.full(n_terms, -1, dtype=np.int64)
+    broad_hit = np.full(n_terms, -1, dtype=np.int64)
+    
+    # Each term writes only its own slots, so terms can run in parallel
+    for t in prange(n_terms):
+        lo = term_offsets[t]
+        hi = term_offsets[t + 1]
+        
+        # PHRASE: look up the key of every n-gram whose length some phrase has
+        best = -1
+        for i in range(lo, hi):
+            key = 0
+            for j in range(i, min(i + max_len, hi)):
+                if term_ids[j] < 0:
+                    break
+                key = key * base + term_ids[j] + 1
+                if is_phrase_len[j - i + 1]:
+                    k = np.searchsorted(phrase_keys, key)
+                    if k < len(phrase_keys) and phrase_keys[k] == key:
+                        if best < 0 or phrase_pos[k] < best:
+                            best = phrase_pos[k]
+        if best >= 0:
+            phrase_hit[t] = best
+            continue
+        
+        # BROAD: subset-check the rules filed under each of the term's tokens
+        ids = np.unique(term_ids[lo:hi])
+        for token_id in ids:
+            if token_id < 0:
+                continue
+            for r in range(pivot_offsets[token_id], pivot_offsets[token_id + 1]):
+                pos = pivot_rules[r]
+                if best >= 0 and pos >= best:
+                    continue
+                # Two-pointer subset test on sorted ids
+                k = 0
+                subset = True
+                for q in range(rule_offsets[pos], rule_offsets[pos + 1]):
+                    while k < len(ids) and ids[k] < rule_ids[q]:
+                        k += 1
+                    if k == len(ids) or ids[k] != rule_ids[q]:
+                        subset = False
+                        break
+                if subset:
+                    best = pos
+        broad_hit[t] = best
+    
+    return phrase_hit, broad_hit
+
+@lru_cache(maxsize=None)
+def _compiled_match_kernel():
+    """_match_kernel compiled by numba (imported here), or None if numba fails to import"""
+    global prange
+    try:
+        from numba import njit, prange
+    except ImportError:
+        return None
+    return njit(cache=True, parallel=True)(_match_kernel)
+
+def match_tokens_kernel(token_lists, kernel_index, first_phrase_match):
+    """
+    (phrase_hit, broad_hit) positions of the first PHRASE and (if none) the
+    first BROAD negative for each token list, -1 where nothing matches, via
+    the compiled _match_kernel over a build_kernel_index result.
+    Terms long enough to contain a phrase the kernel left out get their
+    PHRASE check from first_phrase_match(tokens) (a position or None), which
+    beats any BROAD match.
+    Returns None if numba can't be imported after all.
+    """
+    kernel = _compiled_match_kernel()
+    if kernel is None:
+        return None
+    
+    vocab, base, long_phrase_len, *arrays = kernel_index
+    n_terms = len(token_lists)
+    lengths = np.fromiter(map(len, token_lists), dtype=np.int64, count=n_terms)
+    term_offsets = np.zeros(n_terms + 1, dtype=np.int64)
+    np.cumsum(lengths, out=term_offsets[1:])
+    term_ids = vocab.get_indexer(list(chain.from_iterable(token_lists))).astype(np.int64)
+    phrase_hit, broad_hit = kernel(term_ids, term_offsets, base, *arrays)
+    
+    if long_phrase_len:
+        for i in np.flatnonzero(lengths >= long_phrase_len):
+            phrase_pos = first_phrase_match(token_lists[i])
+            if phrase_pos is not None:
+                phrase_hit[i] = phrase_pos
+                broad_hit[i] = -1
+    return phrase_hit, broad_hit
+
 class Matcher:
     def __init__(self, negatives_df):
-        self.exact_negatives = []
+        # EXACT: normalized token tuple -> original keyword (first listed wins)
+        self.exact_original = {}
         self.phrase_negatives = []
         self.broad_negatives = []
         
         self._preprocess_negatives(negatives_df)
+        self._build_batch_index()
 
     def _preprocess_negatives(self, df):
-        for _, row in df.iterrows():
-            raw_keyword = row['negative_keyword']
-            match_type = row['match_type']
-            
-            normalized = normalize(raw_keyword)
-            tokens = tokenize(normalized)
-            
-            if not tokens: # Skip empty
+        buckets = {
+            'PHRASE': self.phrase_negatives,
+            'BROAD': self.broad_negatives
+        }
+        
+        # One group per match type (keeps file order within each group)
+        for match_type, group in df.groupby('match_type', sort=False, observed=True):
+            bucket = buckets.get(match_type)
+            if bucket is None and match_type != 'EXACT':
                 continue
+            
+            for raw_keyword in group['negative_keyword']:
+                normalized = normalize(raw_keyword)
+                tokens = tokenize(normalized)
                 
-            entry = {
-                'original': raw_keyword,
-                'tokens': tokens,
-                'match_type': match_type
-            }
-
-            if match_type == 'EXACT':
-                self.exact_negatives.append(entry)
-            elif match_type == 'PHRASE':
-                self.phrase_negatives.append(entry)
-            elif match_type == 'BROAD':
-                self.broad_negatives.append(entry)
+                if not tokens: # Skip empty
+                    continue
+                
+                if bucket is None:
+                    self.exact_original.setdefault(tuple(tokens), raw_keyword)
+                    continue
+                    
+                bucket.append({
+                    'original': raw_keyword,
+                    'tokens': tokens,
+                    'token_set': frozenset(tokens),
+                    'match_type': match_type
+                })
+
+    def _build_batch_index(self):
+        """
+        Builds the lookup structures used by `match_batch` and `match`:
+        - EXACT: hash set of normalized keywords
+        - PHRASE: Aho-Corasick automaton (build_phrase_automaton); without
+          pyahocorasick, a first token -> phrase negative ids index
+        - BROAD: token -> negative ids index plus the number of distinct tokens
+          each negative requires
+        - with numba, the integer-coded PHRASE/BROAD negatives for
+          match_tokens_kernel (build_kernel_index)
+        """
+        self.exact_keys = {" ".join(key) for key in self.exact_original}
+
+        phrase_tokens = [neg['tokens'] for neg in self.phrase_negatives]
+        self.phrase_automaton = build_phrase_automaton(phrase_tokens)
+
+        self.phrase_by_first = {}
+        if self.phrase_automaton is None:
+            for neg_id, tokens in enumerate(phrase_tokens):
+                self.phrase_by_first.setdefault(tokens[0], []).append(neg_id)
+
+        self.broad_index = {}
+        self.broad_required = []
+        for neg_id, neg in enumerate(self.broad_negatives):
+            for token in neg['token_set']:
+                self.broad_index.setdefault(token, []).append(neg_id)
+            self.broad_required.append(len(neg['token_set']))
+
+        self.kernel_index = None
+        if NUMBA_SUPPORT and (self.phrase_negatives or self.broad_negatives):
+            broad_token_sets = [neg['token_set'] for neg in self.broad_negatives]
+            self.kernel_index = build_kernel_index(phrase_tokens, broad_token_sets,
+                                                   rarest_tokens(broad_token_sets))
+
+    def _first_phrase_match(self, normalized_term: str, term_tokens: list[str]):
+        """
+        Id of the first-listed PHRASE negative contained in the term, or None.
+        """
+        if self.phrase_automaton is not None:
+            hits = self.phrase_automaton.iter(f" {normalized_term} ")
+            return min((neg_id for _, neg_id in hits), default=None)
+
+        # Only negatives starting with one of the term's tokens can match
+        candidates = sorted({neg_id for token in term_tokens
+                             for neg_id in self.phrase_by_first.get(token, ())})
+        return next((neg_id for neg_id in candidates
+                     if is_phrase_match(term_tokens, self.phrase_negatives[neg_id]['tokens'])), None)
+
+    def _is_excluded_normalized(self, normalized_term: str) -> bool:
+        """
+        Same decision as `match`, for an already normalized term.
+        """
+        if not normalized_term:
+            return False
+
+        # 1. Exact Match
+        if normalized_term in self.exact_keys:
+            return True
+
+        # 2. Phrase Match
+        if self.phrase_automaton is not None:
+            for _ in self.phrase_automaton.iter(f" {normalized_term} "):
+                return True
+        elif self._first_phrase_match(normalized_term, tokenize(normalized_term)) is not None:
+            return True
+
+        # 3. Broad Match: count distinct term tokens per candidate negative
+        found = {}
+        for token in set(tokenize(normalized_term)):
+            for neg_id in self.broad_index.get(token, ()):
+                found[neg_id] = found.get(neg_id, 0) + 1
+                if found[neg_id] == self.broad_required[neg_id]:
+                    return True
+
+        return False
 
     def match(self, search_term: str):
         """
@@ -109,22 +418,52 @@ class Matcher:
         if not term_tokens:
             return False, None
 
-        # 1. Exact Match
-        for neg in self.exact_negatives:
-            if is_exact_match(term_tokens, neg['tokens']):
-                return True, f"Excluded by EXACT negative: {neg['original']}"
+        # 1. Exact Match: one hash lookup on the token tuple
+        exact = self.exact_original.get(tuple(term_tokens))
+        if exact is not None:
+            return True, f"Excluded by EXACT negative: {exact}"
 
         # 2. Phrase Match
-        for neg in self.phrase_negatives:
-            # Optimization: could check if all tokens are present first (broad check) before order check?
-            # But phrase usually assumes simpler check. 
-            # Optimization: Quick length check is already in `is_phrase_match`.
-            if is_phrase_match(term_tokens, neg['tokens']):
-                return True, f"Excluded by PHRASE negative: {neg['original']}"
-
-        # 3. Broad Match
-        for neg in self.broad_negatives:
-            if is_broad_match(term_tokens, neg['tokens']):
+        neg_id = self._first_phrase_match(normalized_term, term_tokens)
+        if neg_id is not None:
+            return True, f"Excluded by PHRASE negative: {self.phrase_negatives[neg_id]['original']}"
+
+        # 3. Broad Match: only negatives sharing a token with the term are candidates
+        term_set = set(term_tokens)
+        candidates = sorted({neg_id for token in term_set
+                             for neg_id in self.broad_index.get(token, ())})
+        for neg_id in candidates:
+            neg = self.broad_negatives[neg_id]
+            if neg['token_set'].issubset(term_set):
                 return True, f"Excluded by BROAD negative: {neg['original']}"
 
         return False, None
+
+    def match_batch(self, search_terms) -> np.ndarray:
+        """
+        Checks a whole column of search terms at once.
+        Returns a boolean ndarray aligned with `search_terms` (True = excluded).
+        Duplicate terms are only matched once.
+        """
+        codes, uniques = pd.factorize(pd.Series(search_terms, dtype=object))
+        normalized = normalize_series(pd.Series(uniques, dtype=object))
+        kernel_hits = None
+        if self.kernel_index is not None and len(uniques) >= KERNEL_MIN_TERMS:
+            # EXACT by hash lookup, then PHRASE/BROAD through the compiled kernel
+            hits = normalized.isin(self.exact_keys).to_numpy(copy=True)
+            rest = np.flatnonzero(~hits & (normalized != '').to_numpy())
+            kernel_hits = match_tokens_kernel(
+                normalized.iloc[rest].str.split().to_numpy(), self.kernel_index,
+                lambda tokens: self._first_phrase_match(" ".join(tokens), tokens))
+        if kernel_hits is not None:
+            phrase_hit, broad_hit = kernel_hits
+            hits[rest] = (phrase_hit >= 0) | (broad_hit >= 0)
+        else:
+            hits = np.fromiter((self._is_excluded_normalized(term) for term in normalized),
+                               dtype=bool, count=len(uniques))
+
+        # NaN terms get code -1 and are never excluded (normalize() -> "")
+        excluded = np.zeros(len(codes), dtype=bool)
+        valid = codes >= 0
+        excluded[valid] = hits[codes[valid]]
+        return excluded
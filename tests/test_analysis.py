@@ -0,0 +1,100 @@
+import os
+import random
+import sys
+import unittest
+from unittest import mock
+import pandas as pd
+
+# Same bare-name imports as the CLI (numba caches compiled kernels per module name)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import analysis
+from analysis import analyze_search_terms
+from matcher import Matcher
+
+def random_terms_df(seed, n_terms=1500):
+    """Search terms with metrics, drawn from a small vocabulary so n-grams repeat"""
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(30)]
+    return pd.DataFrame({
+        'Search term': [" ".join(rng.choices(words, k=rng.randint(0, 6))) for _ in range(n_terms)],
+        'Clicks': [rng.randint(0, 20) for _ in range(n_terms)],
+        'Cost': [round(rng.uniform(0, 10), 2) for _ in range(n_terms)],
+        'Impressions': [rng.randint(0, 500) for _ in range(n_terms)],
+    })
+
+def by_ngram(result_df):
+    """Order-independent form of an analyze_search_terms result"""
+    return result_df.sort_values('N-Gram').reset_index(drop=True)
+
+class TestNgramAnalysis(unittest.TestCase):
+    def setUp(self):
+        self.matcher = Matcher(pd.DataFrame([
+            {'negative_keyword': 'w1 w2', 'match_type': 'PHRASE'},
+            {'negative_keyword': 'w3', 'match_type': 'BROAD'},
+        ]))
+
+    def test_counts_each_ngram_once_per_remaining_term(self):
+        terms = pd.DataFrame({
+            'Search term': ["buy shoes", "buy shoes shoes", "kids shoes", None],
+            'Clicks': [1, 2, 4, 8],
+            'Cost': ["1,000", "2", "junk", "3"],
+        })
+        negatives = pd.DataFrame([{'negative_keyword': 'kids', 'match_type': 'BROAD'}])
+        for numba in (True, False):
+            with self.subTest(numba=numba), \
+                    mock.patch.object(analysis, 'NUMBA_SUPPORT', numba and analysis.NUMBA_SUPPORT):
+                result = by_ngram(analyze_search_terms(terms, negatives, 2)).set_index('N-Gram')
+                self.assertEqual(sorted(result.index), ['buy', 'buy shoes', 'shoes', 'shoes shoes'])
+                self.assertEqual(result.loc['shoes', 'Occurrence Count'], 2)
+                self.assertEqual(result.loc['shoes', 'Clicks'], 3)
+                self.assertEqual(result.loc['buy shoes', 'Cost'], 1002)
+                self.assertEqual(result.loc['shoes shoes', 'Word Count'], 2)
+                self.assertEqual(result.loc['buy', 'Impressions'], 0)
+
+    def test_numba_and_pandas_paths_agree(self):
+        terms = random_terms_df(seed=0)
+        results = {}
+        for numba in (True, False):
+            with mock.patch.object(analysis, 'NUMBA_SUPPORT', numba and analysis.NUMBA_SUPPORT):
+                results[numba] = by_ngram(analyze_search_terms(terms, max_n=3, matcher=self.matcher, top_k=None))
+        pd.testing.assert_frame_equal(results[True], results[False])
+
+    def test_overflowing_keys_fall_back_to_pandas(self):
+        terms = random_terms_df(seed=1, n_terms=300)
+        tokens = terms['Search term'].str.split().to_numpy()
+        # 31 ** 13 no longer fits in an int64 key
+        self.assertIsNone(analysis._ngram_pairs_numba(tokens, 13))
+
+        with mock.patch.object(analysis, '_ngram_pairs_pandas', wraps=analysis._ngram_pairs_pandas) as pandas_path:
+            result = analyze_search_terms(terms, max_n=13, matcher=self.matcher, top_k=None)
+        self.assertTrue(pandas_path.called)
+        with mock.patch.object(analysis, 'NUMBA_SUPPORT', False):
+            expected = analyze_search_terms(terms, max_n=13, matcher=self.matcher, top_k=None)
+        pd.testing.assert_frame_equal(by_ngram(result), by_ngram(expected))
+
+    def test_top_k_keeps_the_most_frequent_ngrams(self):
+        terms = random_terms_df(seed=2)
+        full = analyze_search_terms(terms, max_n=2, matcher=self.matcher, top_k=None)
+        top = analyze_search_terms(terms, max_n=2, matcher=self.matcher, top_k=25)
+        self.assertEqual(len(top), 25)
+        self.assertEqual(top['Occurrence Count'].tolist(), full['Occurrence Count'].head(25).tolist())
+        self.assertTrue(top['Occurrence Count'].is_monotonic_decreasing)
+        self.assertEqual(len(analyze_search_terms(terms, max_n=2, matcher=self.matcher, top_k=10 ** 6)), len(full))
+
+    def test_worker_processes_match_single_process(self):
+        terms = random_terms_df(seed=3)
+        expected = by_ngram(analyze_search_terms(terms, max_n=3, matcher=self.matcher, top_k=None))
+        parallel = analyze_search_terms(terms, max_n=3, matcher=self.matcher, top_k=None, n_jobs=2)
+        pd.testing.assert_frame_equal(by_ngram(parallel), expected)
+
+        # Chunked input is merged the same way
+        chunks = [terms.iloc[i:i + 400] for i in range(0, len(terms), 400)]
+        pd.testing.assert_frame_equal(
+            by_ngram(analyze_search_terms(chunks, max_n=3, matcher=self.matcher, top_k=None)), expected)
+
+    def test_no_remaining_terms(self):
+        terms = pd.DataFrame({'Search term': ["w3 shoes", "", None]})
+        self.assertIsNone(analyze_search_terms(terms, matcher=self.matcher))
+
+if __name__ == '__main__':
+    unittest.main()
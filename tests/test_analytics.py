@@ -0,0 +1,71 @@
+import os
+import sys
+import unittest
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from analytics import PerformanceAnalytics
+
+def analytics_for(results_df):
+    return PerformanceAnalytics(results_df, None, results_df)
+
+class TestPerformanceAnalytics(unittest.TestCase):
+    def test_high_risk_terms_quantile_thresholds(self):
+        # Remaining impressions 10..100: q75 = 77.5, q90 = 91
+        results = pd.DataFrame({
+            'Search term': [f"term {i}" for i in range(10)] + ['excluded'],
+            'Impressions': [10, 20, 30, 40, 50, 60, 70, 80, 90, 100, 1000],
+            'Clicks': [0] * 8 + [1, 0, 0],
+            'excluded_by_negatives': [False] * 10 + [True],
+        })
+        risk = analytics_for(results).identify_high_risk_terms()
+        # term 8 has a click; the excluded term is never a risk
+        self.assertEqual(risk, [
+            {'term': 'term 7', 'impressions': 80, 'clicks': 0, 'risk_level': 'HIGH'},
+            {'term': 'term 9', 'impressions': 100, 'clicks': 0, 'risk_level': 'CRITICAL'},
+        ])
+
+    def test_zero_impressions_and_no_remaining_terms(self):
+        results = pd.DataFrame({
+            'Search term': ['a', 'b', 'c', 'd', 'e'],
+            'Impressions': [0, 0, 0, 0, 5],
+            'Clicks': [0, 0, 0, 0, 0],
+            'excluded_by_negatives': [False] * 5,
+        })
+        with np.errstate(divide='raise', invalid='raise'):
+            risk = analytics_for(results).identify_high_risk_terms()
+        self.assertEqual([r['term'] for r in risk], ['e'])
+        
+        results['excluded_by_negatives'] = True
+        analytics = analytics_for(results)
+        self.assertEqual(analytics.identify_high_risk_terms(), [])
+        self.assertEqual(analytics.calculate_cost_savings()['cost_reduction_percentage'], 0)
+
+    def test_nan_and_non_numeric_metric_cells(self):
+        results = pd.DataFrame({
+            'Search term': ['a', float('nan'), 'c', 'd', 'e'],
+            'Impressions': ['1,000', '500', 'junk', None, '20'],
+            'Clicks': ['0', '0', '0', '0', 'n/a'],
+            'Cost': ['10', 'x', None, '5.5', '2'],
+            'excluded_by_negatives': [True, False, False, False, False],
+        })
+        summary = analytics_for(results).get_executive_summary()
+        metrics = summary['metrics']
+        # Unparseable cells are NaN and left out of every sum and quantile
+        self.assertEqual(metrics['cost_waste_prevented'], 10)
+        self.assertEqual(metrics['total_remaining_spend'], 7.5)
+        self.assertEqual(metrics['impressions_eliminated'], 0)
+        # Only 500 and 20 impressions remain (q75 = 380); the missing term is reported as "nan"
+        self.assertEqual(metrics['high_risk_terms'],
+                         [{'term': 'nan', 'impressions': 500, 'clicks': 0, 'risk_level': 'CRITICAL'}])
+        self.assertEqual(summary['terms_excluded'], 1)
+
+    def test_missing_metric_columns(self):
+        results = pd.DataFrame({'Search term': ['a', 'b'], 'excluded_by_negatives': [True, False]})
+        analytics = analytics_for(results)
+        self.assertEqual(analytics.calculate_cost_savings()['cost_waste_prevented'], 2.5)
+        self.assertEqual(analytics.identify_high_risk_terms(), [])
+
+if __name__ == '__main__':
+    unittest.main()
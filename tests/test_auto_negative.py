@@ -0,0 +1,105 @@
+import os
+import sys
+import unittest
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from auto_negative import AutoNegativeEngine
+
+def keyword_stats(rows):
+    """extract_keywords_from_terms-shaped frame from (word, count, cost, clicks, imps) rows"""
+    return pd.DataFrame(rows, columns=['word', 'count', 'cost', 'clicks', 'imps']).set_index('word')
+
+class TestConfidenceAndImpact(unittest.TestCase):
+    def setUp(self):
+        self.engine = AutoNegativeEngine(pd.DataFrame({'Search term': []}))
+
+    def test_confidence_score_components(self):
+        stats = keyword_stats([
+            ('all_poor_zero_clicks', 4, 0.0, 0, 100),    # 30 + 40
+            ('half_poor', 2, 0.0, 0, 100),               # 15 + 40
+            ('more_than_all', 9, 0.0, 0, 100),           # frequency capped at 30
+            ('no_impressions', 4, 0.0, 0, 0),            # no zero-click points
+            ('cpc_5', 4, 50.0, 10, 100),                 # 30 + 36 + 15 (CPC 5 is not > 5)
+            ('cpc_above_5', 4, 50.1, 10, 100),           # 30 + 36 + 30
+            ('cpc_2', 4, 20.0, 10, 100),                 # 30 + 36 + 0 (CPC 2 is not > 2)
+            ('cpc_above_2', 4, 20.1, 10, 100),           # 30 + 36 + 15
+        ])
+        confidence = self.engine.calculate_confidence_scores(stats, total_poor_performers=4)
+        np.testing.assert_allclose(confidence, [70, 55, 70, 30, 81, 96, 66, 81])
+
+    def test_confidence_with_zero_clicks_and_impressions(self):
+        stats = keyword_stats([('a', 1, 10.0, 0, 0), ('b', 1, 10.0, 0, 5)])
+        with np.errstate(all='raise'):
+            confidence = self.engine.calculate_confidence_scores(stats, total_poor_performers=0)
+        np.testing.assert_allclose(confidence, [30, 70])
+
+    def test_impact_rating_boundaries(self):
+        confidence = np.array([85, 85, 84.9, 75, 75, 74.9, 65, 64.9])
+        cost = np.array([100.01, 100, 1000, 50.01, 50, 1000, 0, 1000])
+        self.assertEqual(self.engine._get_impact_ratings(confidence, cost).tolist(),
+                         ['CRITICAL', 'HIGH', 'HIGH', 'HIGH', 'MEDIUM', 'MEDIUM', 'MEDIUM', 'LOW'])
+
+class TestSuggestions(unittest.TestCase):
+    def test_suggests_words_of_zero_click_terms(self):
+        terms = pd.DataFrame({
+            'Search term': ['free shoes', 'free shoes download', 'free', 'buy shoes'],
+            'Clicks': [0, 0, 0, 5],
+            'Impressions': [100, 50, 20, 100],
+            'Cost': [0, 0, 0, 10],
+        })
+        suggestions = AutoNegativeEngine(terms).generate_suggestions()
+        # "free" is in all 3 poor terms (30 + 40 points), "shoes" in 2 of them (20 + 40)
+        self.assertEqual(len(suggestions), 1)
+        self.assertEqual(suggestions[0], {
+            'keyword': 'free', 'confidence': 70.0, 'occurrences': 3, 'zero_click_count': 170,
+            'wasted_cost': 0.0, 'match_type': 'BROAD', 'impact_rating': 'MEDIUM'})
+
+    def test_missing_terms_yield_no_keyword(self):
+        terms = pd.DataFrame({
+            'Search term': ['free shoes', None, float('nan')],
+            'Clicks': [0, 0, 0],
+            'Impressions': [100, 500, 500],
+        })
+        suggestions = AutoNegativeEngine(terms).generate_suggestions(threshold=0)
+        # The missing terms are poor performers (so "free" is in 1 of 3) but add no words
+        self.assertEqual(sorted(s['keyword'] for s in suggestions), ['free', 'shoes'])
+        self.assertEqual(suggestions[0]['confidence'], 50.0)
+        self.assertEqual(suggestions[0]['impact_rating'], 'LOW')
+
+    def test_zero_clicks_or_impressions_do_not_divide(self):
+        terms = pd.DataFrame({
+            'Search term': ['a', 'b', 'c'],
+            'Clicks': [0, 0, 2],
+            'Impressions': [0, 50, 0],
+            'Cost': [5, 5, 5],
+        })
+        with np.errstate(all='raise'):
+            poor = AutoNegativeEngine(terms).analyze_poor_performers()
+        self.assertEqual(poor['Search term'].tolist(), ['b'])
+        self.assertEqual(poor[['CTR', 'CPC']].to_numpy().tolist(), [[0, 0]])
+
+    def test_non_numeric_and_missing_metric_cells(self):
+        terms = pd.DataFrame({
+            'Search term': ['cheap hats', 'cheap hats', 'cheap caps'],
+            'Clicks': ['0', 'n/a', None],
+            'Impressions': ['200', 'junk', '40'],
+            'Cost': ['1.5', '', 'x'],
+        })
+        engine = AutoNegativeEngine(terms)
+        poor = engine.analyze_poor_performers()
+        # Junk clicks count as 0, junk impressions as 1 (so the second row is not poor)
+        self.assertEqual(poor['Search term'].tolist(), ['cheap hats', 'cheap caps'])
+        self.assertEqual(poor['Impressions'].tolist(), [200, 40])
+        self.assertEqual(poor['Cost'].tolist(), [1.5, 0])
+        self.assertEqual([s['keyword'] for s in engine.generate_suggestions()], ['cheap'])
+
+    def test_no_poor_performers(self):
+        terms = pd.DataFrame({'Search term': ['shoes'], 'Clicks': [3], 'Impressions': [100]})
+        engine = AutoNegativeEngine(terms)
+        self.assertEqual(engine.generate_suggestions(), [])
+        self.assertEqual(engine.get_impact_summary()['total_suggested'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,30 @@
+import os
+import random
+import sys
+import tempfile
 import unittest
+from unittest import mock
 import pandas as pd
-from src.matcher import Matcher
+
+# The src modules import each other by bare name (and numba caches compiled
+# kernels per module name); import them the same way the CLI does
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import main
+import matcher
+from matcher import Matcher
+from main import filter_search_terms, load_search_terms, stream_filter
+
+def random_negatives_and_terms(seed, n_negatives=200, n_terms=2000):
+    """Overlapping negatives of every match type plus terms drawn from the same words"""
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(25)]
+    negatives = pd.DataFrame([
+        {'negative_keyword': " ".join(rng.choices(words, k=rng.randint(1, 4))),
+         'match_type': rng.choice(['EXACT', 'PHRASE', 'BROAD'])}
+        for _ in range(n_negatives)
+    ])
+    terms = [" ".join(rng.choices(words, k=rng.randint(0, 6))) for _ in range(n_terms)]
+    return negatives, terms + [None, '   ', '"w1 w2"']
 
 class TestMatchingLogic(unittest.TestCase):
     def setUp(self):
@@ -67,6 +91,91 @@ class TestSpecificAcceptanceCriteria(unittest.TestCase):
         # Search: running sandals -> not excluded
         self.assertFalse(matcher.match("running sandals")[0])
 
+    def test_match_batch_aligned_with_match(self):
+        df = pd.DataFrame([
+            {'negative_keyword': 'running shoes', 'match_type': 'PHRASE'},
+            {'negative_keyword': 'kids', 'match_type': 'BROAD'}
+        ])
+        matcher = Matcher(df)
+        terms = ["buy running shoes", "shoes for running", "kids shoes", "", None, "buy running shoes"]
+        
+        excluded = matcher.match_batch(terms)
+        self.assertEqual(excluded.tolist(), [matcher.match(t)[0] for t in terms])
+        self.assertEqual(excluded.tolist(), [True, False, True, False, False, True])
+
+    def test_filter_search_terms_reports_first_listed_negative(self):
+        negatives = pd.DataFrame([
+            {'negative_keyword': 'shoes', 'match_type': 'PHRASE'},
+            {'negative_keyword': 'running shoes', 'match_type': 'PHRASE'},
+            {'negative_keyword': 'kids red', 'match_type': 'BROAD'},
+            {'negative_keyword': 'kids', 'match_type': 'BROAD'},
+            {'negative_keyword': 'buy running shoes', 'match_type': 'EXACT'}
+        ])
+        terms = pd.DataFrame({'Search term': [
+            "buy running shoes", "cheap running shoes", "red kids hats", "kids hats", "hats", None
+        ]})
+        
+        results_df, audit_df = filter_search_terms(terms, negatives)
+        # EXACT wins over PHRASE/BROAD; within a match type the first listed negative wins
+        self.assertEqual(audit_df['matched_negative_match_type'].tolist(),
+                         ['EXACT', 'PHRASE', 'BROAD', 'BROAD', '', ''])
+        self.assertEqual(audit_df['matched_negative_keyword'].tolist(),
+                         ['buy running shoes', 'shoes', 'kids red', 'kids', '', ''])
+        self.assertEqual(audit_df['excluded_by_negatives'].tolist(), [True] * 4 + [False] * 2)
+        self.assertEqual(len(results_df), 2)
+
+    def test_match_batch_agrees_with_match(self):
+        negatives, terms = random_negatives_and_terms(seed=0)
+        # Plus a phrase too long for the compiled kernel's int64 keys
+        long_phrase = " ".join(f"l{i}" for i in range(14))
+        negatives = pd.concat([negatives, pd.DataFrame([{'negative_keyword': long_phrase, 'match_type': 'PHRASE'}])],
+                              ignore_index=True)
+        terms = terms + [f"x {long_phrase} y", "l0 l1 l2"]
+        for numba in (True, False):
+            for ahocorasick in (True, False):
+                with self.subTest(numba=numba, ahocorasick=ahocorasick), \
+                        mock.patch.object(matcher, 'KERNEL_MIN_TERMS', 0), \
+                        mock.patch.object(matcher, 'NUMBA_SUPPORT', numba and matcher.NUMBA_SUPPORT), \
+                        mock.patch.object(matcher, 'AHOCORASICK_SUPPORT', ahocorasick and matcher.AHOCORASICK_SUPPORT):
+                    m = Matcher(negatives)
+                    expected = [m.match(term)[0] for term in terms]
+                    self.assertEqual(m.match_batch(pd.Series(terms, dtype=object)).tolist(), expected)
+
+    def test_filter_search_terms_agrees_across_backends(self):
+        negatives, terms = random_negatives_and_terms(seed=1)
+        # A phrase too long for the compiled matcher's int64 keys, in a term
+        # that also contains an earlier BROAD negative (PHRASE still wins)
+        long_phrase = " ".join(f"l{i}" for i in range(14))
+        negatives = pd.concat([
+            pd.DataFrame([{'negative_keyword': 'l0', 'match_type': 'BROAD'}]),
+            negatives,
+            pd.DataFrame([{'negative_keyword': long_phrase, 'match_type': 'PHRASE'}]),
+        ], ignore_index=True)
+        terms_df = pd.DataFrame({'Search term': terms + [f"x {long_phrase} y"]})
+        columns = ['excluded_by_negatives', 'matched_negative_keyword', 'matched_negative_match_type']
+        
+        audits = {}
+        for numba in (True, False):
+            for ahocorasick in (True, False):
+                with mock.patch.object(main, 'KERNEL_MIN_TERMS', 0), \
+                        mock.patch.object(main, 'NUMBA_SUPPORT', numba and main.NUMBA_SUPPORT), \
+                        mock.patch.object(main, 'AHOCORASICK_SUPPORT', ahocorasick and main.AHOCORASICK_SUPPORT):
+                    if numba and main.NUMBA_SUPPORT:
+                        # Only the long phrase leaves the kernel
+                        self.assertIsNotNone(main.build_negative_buckets(negatives)[3][2])
+                    audits[numba, ahocorasick] = filter_search_terms(terms_df, negatives)[1][columns]
+        
+        reference = audits[False, False]
+        for backends, audit in audits.items():
+            with self.subTest(numba=backends[0], ahocorasick=backends[1]):
+                pd.testing.assert_frame_equal(audit, reference)
+        self.assertEqual(reference['matched_negative_match_type'].iloc[-1], 'PHRASE')
+        self.assertEqual(reference['matched_negative_keyword'].iloc[-1], long_phrase)
+        
+        # Same exclusion decisions as the reference Matcher
+        m = Matcher(negatives)
+        self.assertEqual(reference['excluded_by_negatives'].tolist(), [m.match(t)[0] for t in terms_df['Search term']])
+
     def test_punctuation_and_case(self):
         # Test case insensitivity and punctuation handling
         df = pd.DataFrame([{'negative_keyword': 'Kids', 'match_type': 'BROAD'}])
@@ -95,5 +204,73 @@ class TestSpecificAcceptanceCriteria(unittest.TestCase):
         # For now, let's assume strict tokenization (simplest).
         pass
 
+class TestLoading(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write_mixed_encoding_csv(self):
+        # ASCII for well past the 10KB encoding sample, then one cp1252 row
+        path = os.path.join(self.tmp.name, 'terms.csv')
+        rows = ['Search term,Clicks,Impressions,Cost'] + [f'running shoes {i},1,10,0.5' for i in range(600)]
+        with open(path, 'wb') as f:
+            f.write(('\n'.join(rows) + '\n').encode('ascii'))
+            f.write('café shoes,2,20,1.0\n'.encode('cp1252'))
+        return path
+
+    def test_mixed_encoding_csv_is_decoded(self):
+        df = load_search_terms(self.write_mixed_encoding_csv())
+        self.assertEqual(len(df), 601)
+        self.assertEqual(df['Search term'].iloc[-1], 'café shoes')
+
+    def test_stream_filter_decodes_mixed_encoding(self):
+        negatives = os.path.join(self.tmp.name, 'negatives.csv')
+        pd.DataFrame({'negative_keyword': ['café'], 'match_type': ['BROAD']}).to_csv(negatives, index=False)
+        output = os.path.join(self.tmp.name, 'review.csv')
+        audit = os.path.join(self.tmp.name, 'audit.csv')
+        
+        excluded, remaining = stream_filter(self.write_mixed_encoding_csv(), negatives, output,
+                                            audit_output=audit, chunksize=250)
+        self.assertEqual((excluded, remaining), (1, 600))
+        self.assertEqual(len(pd.read_csv(output)), 600)
+        self.assertEqual(pd.read_csv(audit, encoding='utf-8')['Search term'].iloc[-1], 'café shoes')
+
+    def test_streamed_xlsx_reads_first_sheet(self):
+        import openpyxl
+        workbook = openpyxl.Workbook()
+        workbook.active.append(['Search term', 'Clicks'])
+        workbook.active.append(['first sheet', 1])
+        other = workbook.create_sheet('other')
+        other.append(['Search term', 'Clicks'])
+        other.append(['second sheet', 2])
+        workbook.active = 1  # Saved with the second sheet active
+        path = os.path.join(self.tmp.name, 'terms.xlsx')
+        workbook.save(path)
+        
+        streamed = pd.concat(main.iter_search_terms(path))
+        self.assertEqual(streamed['Search term'].tolist(), load_search_terms(path)['Search term'].tolist())
+        self.assertEqual(streamed['Search term'].tolist(), ['first sheet'])
+
+    def test_negatives_cache_keeps_recent_entries_in_private_dir(self):
+        cache_dir = os.path.join(self.tmp.name, 'cache')
+        paths = []
+        for i in range(3):
+            paths.append(os.path.join(self.tmp.name, f'negatives{i}.csv'))
+            pd.DataFrame({'negative_keyword': [f'word{i}'], 'match_type': ['BROAD']}).to_csv(paths[-1], index=False)
+        
+        with mock.patch.object(main, 'NEG_CACHE_DIR', cache_dir), \
+                mock.patch.object(main, 'NEG_CACHE_MAX_ENTRIES', 2):
+            for path in paths:
+                main.load_negatives_with_buckets(path, use_cache=True)
+            self.assertEqual(len(os.listdir(cache_dir)), 2)
+            
+            digest = main._file_digest(paths[-1])
+            key = (main.NEG_CACHE_VERSION, digest, main.AHOCORASICK_SUPPORT, main.NUMBA_SUPPORT)
+            self.assertIsNotNone(main._read_neg_cache(digest, key))
+            if hasattr(os, 'getuid'):
+                # Never unpickle from a directory other users can write to
+                os.chmod(cache_dir, 0o777)
+                self.assertIsNone(main._read_neg_cache(digest, key))
+
 if __name__ == '__main__':
     unittest.main()